@@ -4,7 +4,7 @@ AMM池核心逻辑 - 基于Bittensor/subtensor实现
 """
 
 from decimal import Decimal, getcontext
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List, Optional
 import logging
 
 # 设置高精度计算
@@ -12,6 +12,10 @@ getcontext().prec = 50
 
 logger = logging.getLogger(__name__)
 
+# Moving Price更新中的常量（价格上限为1.0）
+_PRICE_CAP = Decimal("1.0")
+_ONE = Decimal("1")
+
 
 class AMMPool:
     """
@@ -45,6 +49,10 @@ class AMMPool:
         self.moving_alpha = Decimal(str(moving_alpha))
         self.halving_time = halving_time
         
+        # halving_time的Decimal缓存（halving_time被修改时在update_moving_price中重建）
+        self._halving_key = None
+        self._halving_decimal = Decimal("0")
+        
         # 价格相关
         self.current_price = self.get_spot_price()
         self.moving_price = Decimal("0.0")
@@ -67,6 +75,17 @@ class AMMPool:
             return Decimal("0")
         return self.tao_reserves / self.dtao_reserves
     
+    def get_spot_price_f(self) -> float:
+        """
+        获取当前现货价格的float近似值（仅用于记录/展示，交易计算仍使用get_spot_price）
+        
+        Returns:
+            当前dTAO价格（float）
+        """
+        if self.dtao_reserves <= 0:
+            return 0.0
+        return float(self.tao_reserves) / float(self.dtao_reserves)
+    
     def update_moving_price(self, current_block: int) -> None:
         """
         更新Moving Price - 严格基于源代码逻辑和测试用例
@@ -86,11 +105,12 @@ class AMMPool:
         blocks_since_start = max(0, current_block - self.subnet_start_block)
         
         # 限制价格上限为1.0（源代码逻辑）
-        capped_price = min(current_spot, Decimal("1.0"))
+        capped_price = min(current_spot, _PRICE_CAP)
         
         if blocks_since_start == 0:
             # 第一个区块不更新moving_price，保持初始值0.0
-            logger.debug(f"Moving Price保持初始值: 区块={current_block}, 价格={self.moving_price:.8f}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Moving Price保持初始值: 区块={current_block}, 价格={self.moving_price:.8f}")
             return
         
         # 记录更新前的moving price
@@ -100,13 +120,15 @@ class AMMPool:
         # 使用当前配置的moving_alpha值（可能是0.000003默认值或0.1测试值）
         subnet_moving_alpha = self.moving_alpha
         
-        # 计算α值
-        blocks_decimal = Decimal(str(blocks_since_start))
-        halving_decimal = Decimal(str(self.halving_time))
-        alpha = subnet_moving_alpha * blocks_decimal / (blocks_decimal + halving_decimal)
+        # 计算α值（区块数为整数，直接构造Decimal，无需经过字符串）
+        blocks_decimal = Decimal(blocks_since_start)
+        if self._halving_key != self.halving_time:
+            self._halving_key = self.halving_time
+            self._halving_decimal = Decimal(str(self.halving_time))
+        alpha = subnet_moving_alpha * blocks_decimal / (blocks_decimal + self._halving_decimal)
         
         # 执行单次Moving Price更新（标准EMA）
-        one_minus_alpha = Decimal("1") - alpha
+        one_minus_alpha = _ONE - alpha
         current_price_component = alpha * capped_price
         current_moving_component = one_minus_alpha * self.moving_price
         
@@ -116,7 +138,8 @@ class AMMPool:
         # 更新当前价格
         self.current_price = current_spot
         
-        logger.debug(f"Moving Price更新: 区块={current_block}, blocks_since_start={blocks_since_start}, α={alpha:.8f}, old_moving={old_moving:.8f}, new_moving={self.moving_price:.8f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Moving Price更新: 区块={current_block}, blocks_since_start={blocks_since_start}, α={alpha:.8f}, old_moving={old_moving:.8f}, new_moving={self.moving_price:.8f}")
     
     def update_moving_price_multiple_times(self, current_block: int, update_count: int = 14) -> None:
         """
@@ -169,19 +192,25 @@ class AMMPool:
         alpha = self.moving_alpha * blocks_decimal / (blocks_decimal + halving_decimal)
         return alpha
     
-    def inject_tao(self, tao_amount: Decimal) -> Dict[str, Any]:
+    def inject_tao(self, tao_amount: Decimal, return_details: bool = True) -> Optional[Dict[str, Any]]:
         """
         注入TAO到AMM池（模拟Emission注入）
         
         Args:
             tao_amount: 注入的TAO数量
+            return_details: 是否返回注入结果详情（每区块注入时传False，省去注入前后价格的计算）
             
         Returns:
-            注入结果详情
+            注入结果详情；return_details为False且注入成功时返回None
         """
         if tao_amount <= 0:
             return {"success": False, "error": "注入数量必须大于0"}
         
+        if not return_details:
+            self.tao_reserves += tao_amount
+            self.total_tao_injected += tao_amount
+            return None
+        
         old_price = self.get_spot_price()
         old_tao = self.tao_reserves
         
@@ -203,10 +232,11 @@ class AMMPool:
             "dtao_reserves": self.dtao_reserves
         }
         
-        logger.debug(f"TAO注入: {tao_amount}, 价格变化: {old_price} -> {result['new_price']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"TAO注入: {tao_amount}, 价格变化: {old_price} -> {result['new_price']}")
         return result
     
-    def inject_dtao_direct(self, dtao_amount: Decimal) -> Dict[str, Any]:
+    def inject_dtao_direct(self, dtao_amount: Decimal, return_details: bool = True) -> Optional[Dict[str, Any]]:
         """
         直接注入dTAO到AMM池（协议级dTAO产生）
         
@@ -215,13 +245,19 @@ class AMMPool:
         
         Args:
             dtao_amount: 注入的dTAO数量
+            return_details: 是否返回注入结果详情（每区块注入时传False，省去注入前后价格的计算）
             
         Returns:
-            注入结果详情
+            注入结果详情；return_details为False且注入成功时返回None
         """
         if dtao_amount <= 0:
             return {"success": False, "error": "注入数量必须大于0"}
         
+        if not return_details:
+            self.dtao_reserves += dtao_amount
+            self.total_alpha_injected += dtao_amount
+            return None
+        
         old_price = self.get_spot_price()
         old_dtao = self.dtao_reserves
         
@@ -229,18 +265,20 @@ class AMMPool:
         self.dtao_reserves += dtao_amount
         self.total_alpha_injected += dtao_amount  # 统计到alpha注入中
         
+        new_price = self.get_spot_price()
         result = {
             "success": True,
             "injected_dtao": dtao_amount,
             "old_price": old_price,
-            "new_price": self.get_spot_price(),
+            "new_price": new_price,
             "old_dtao_reserves": old_dtao,
             "new_dtao_reserves": self.dtao_reserves,
             "tao_reserves": self.tao_reserves,
-            "price_impact": (self.get_spot_price() - old_price) / old_price if old_price > 0 else Decimal("0")
+            "price_impact": (new_price - old_price) / old_price if old_price > 0 else Decimal("0")
         }
         
-        logger.debug(f"dTAO协议注入: {dtao_amount}, 价格变化: {old_price:.6f} -> {result['new_price']:.6f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"dTAO协议注入: {dtao_amount}, 价格变化: {old_price:.6f} -> {result['new_price']:.6f}")
         return result
     
     def calculate_alpha_injection(self, 
@@ -320,19 +358,17 @@ class AMMPool:
         logger.debug(f"Alpha分离注入: alpha_in={alpha_in}, alpha_out={alpha_out}")
         return result
     
-    def swap_dtao_for_tao(self, dtao_amount: Decimal, slippage_tolerance: Decimal = Decimal("0.01")) -> Dict[str, Any]:
+    def _quote_dtao_for_tao(self, dtao_amount: Decimal, slippage_tolerance: Decimal
+                            ) -> Tuple[Optional[str], Decimal, Decimal, Decimal, Decimal]:
         """
-        用dTAO兑换TAO（卖出dTAO）
+        计算卖出dTAO的结果（不修改池子）
         
-        Args:
-            dtao_amount: 要卖出的dTAO数量
-            slippage_tolerance: 滑点容忍度
-            
         Returns:
-            交易结果详情
+            (错误信息或None, 获得的TAO, 新dTAO储备, 新TAO储备, 滑点)
         """
+        zero = Decimal("0")
         if dtao_amount <= 0:
-            return {"success": False, "error": "交易数量必须大于0"}
+            return "交易数量必须大于0", zero, zero, zero, zero
         
         # 🔧 修正关键错误：卖出dTAO时，dTAO储备增加，TAO储备减少
         # 需要先计算交易结果，然后检查TAO储备是否足够
@@ -350,20 +386,36 @@ class AMMPool:
         
         # 🔧 正确的检查：确保池子有足够的TAO支付给用户
         if tao_received >= self.tao_reserves:
-            return {"success": False, "error": "TAO储备不足，无法支付此交易"}
+            return "TAO储备不足，无法支付此交易", zero, zero, zero, zero
         
         # 检查滑点
         expected_tao = dtao_amount * self.get_spot_price()
         if expected_tao > 0:
             slippage = abs(tao_received - expected_tao) / expected_tao
         else:
-            slippage = Decimal("0")
+            slippage = zero
         
         if slippage > slippage_tolerance:
-            return {
-                "success": False, 
-                "error": f"滑点过大: {slippage:.4f} > {slippage_tolerance:.4f}"
-            }
+            return f"滑点过大: {slippage:.4f} > {slippage_tolerance:.4f}", zero, zero, zero, zero
+        
+        return None, tao_received, new_dtao_reserves, new_tao_reserves, slippage
+    
+    def swap_dtao_for_tao(self, dtao_amount: Decimal, slippage_tolerance: Decimal = Decimal("0.01")) -> Dict[str, Any]:
+        """
+        用dTAO兑换TAO（卖出dTAO）
+        
+        Args:
+            dtao_amount: 要卖出的dTAO数量
+            slippage_tolerance: 滑点容忍度
+            
+        Returns:
+            交易结果详情
+        """
+        error, tao_received, new_dtao_reserves, new_tao_reserves, slippage = self._quote_dtao_for_tao(
+            dtao_amount, slippage_tolerance
+        )
+        if error:
+            return {"success": False, "error": error}
         
         # 执行交易
         old_price = self.get_spot_price()
@@ -382,25 +434,24 @@ class AMMPool:
             "new_tao_reserves": self.tao_reserves
         }
         
-        logger.debug(f"dTAO卖出: {dtao_amount} -> {tao_received} TAO, 滑点: {slippage:.4f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"dTAO卖出: {dtao_amount} -> {tao_received} TAO, 滑点: {slippage:.4f}")
         return result
     
-    def swap_tao_for_dtao(self, tao_amount: Decimal, slippage_tolerance: Decimal = Decimal("0.01")) -> Dict[str, Any]:
+    def _quote_tao_for_dtao(self, tao_amount: Decimal, slippage_tolerance: Decimal
+                            ) -> Tuple[Optional[str], Decimal, Decimal, Decimal, Decimal]:
         """
-        用TAO兑换dTAO（买入dTAO）
+        计算用TAO买入dTAO的结果（不修改池子）
         
-        Args:
-            tao_amount: 要用于购买的TAO数量
-            slippage_tolerance: 滑点容忍度
-            
         Returns:
-            交易结果详情
+            (错误信息或None, 获得的dTAO, 新TAO储备, 新dTAO储备, 滑点)
         """
+        zero = Decimal("0")
         if tao_amount <= 0:
-            return {"success": False, "error": "交易数量必须大于0"}
+            return "交易数量必须大于0", zero, zero, zero, zero
         
         if tao_amount >= self.tao_reserves:
-            return {"success": False, "error": "TAO储备不足"}
+            return "TAO储备不足", zero, zero, zero, zero
         
         # 计算恒定乘积 k = x * y
         k = self.dtao_reserves * self.tao_reserves
@@ -418,13 +469,29 @@ class AMMPool:
         if expected_dtao > 0:
             slippage = abs(dtao_received - expected_dtao) / expected_dtao
         else:
-            slippage = Decimal("0")
+            slippage = zero
         
         if slippage > slippage_tolerance:
-            return {
-                "success": False, 
-                "error": f"滑点过大: {slippage:.4f} > {slippage_tolerance:.4f}"
-            }
+            return f"滑点过大: {slippage:.4f} > {slippage_tolerance:.4f}", zero, zero, zero, zero
+        
+        return None, dtao_received, new_tao_reserves, new_dtao_reserves, slippage
+    
+    def swap_tao_for_dtao(self, tao_amount: Decimal, slippage_tolerance: Decimal = Decimal("0.01")) -> Dict[str, Any]:
+        """
+        用TAO兑换dTAO（买入dTAO）
+        
+        Args:
+            tao_amount: 要用于购买的TAO数量
+            slippage_tolerance: 滑点容忍度
+            
+        Returns:
+            交易结果详情
+        """
+        error, dtao_received, new_tao_reserves, new_dtao_reserves, slippage = self._quote_tao_for_dtao(
+            tao_amount, slippage_tolerance
+        )
+        if error:
+            return {"success": False, "error": error}
         
         # 执行交易
         old_price = self.get_spot_price()
@@ -443,9 +510,106 @@ class AMMPool:
             "new_tao_reserves": self.tao_reserves
         }
         
-        logger.debug(f"dTAO买入: {tao_amount} TAO -> {dtao_received} dTAO, 滑点: {slippage:.4f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"dTAO买入: {tao_amount} TAO -> {dtao_received} dTAO, 滑点: {slippage:.4f}")
         return result
     
+    def swap_tao_for_dtao_batches(self, batches: List[Decimal], slippage_tolerance: Decimal
+                                  ) -> Tuple[Decimal, Decimal, int, Optional[str]]:
+        """
+        按顺序执行多笔买入（与逐笔调用swap_tao_for_dtao结果一致，但不构造结果字典）
+        
+        遇到失败的批次即停止，之后的批次不再执行。无手续费的恒定乘积池连续成交等价于
+        一次成交总量，因此只逐批检查滑点（单批滑点 = a / (x + a)，x为该批前的TAO储备），
+        成功部分用一次 k / (x + 总量) 更新池子。
+        
+        Returns:
+            (花费的TAO, 获得的dTAO, 成功批次数, 失败原因或None)
+        """
+        total_tao_spent = Decimal("0")
+        successful_batches = 0
+        error = None
+        tao_reserves = self.tao_reserves
+        
+        for tao_amount in batches:
+            if tao_amount <= 0:
+                error = "交易数量必须大于0"
+                break
+            if tao_amount >= tao_reserves:
+                error = "TAO储备不足"
+                break
+            slippage = tao_amount / (tao_reserves + tao_amount)
+            if slippage > slippage_tolerance:
+                error = f"滑点过大: {slippage:.4f} > {slippage_tolerance:.4f}"
+                break
+            tao_reserves += tao_amount
+            total_tao_spent += tao_amount
+            successful_batches += 1
+        
+        if successful_batches == 0:
+            return total_tao_spent, Decimal("0"), 0, error
+        
+        k = self.dtao_reserves * self.tao_reserves
+        new_dtao_reserves = k / tao_reserves
+        total_dtao_received = self.dtao_reserves - new_dtao_reserves
+        
+        self.dtao_reserves = new_dtao_reserves
+        self.tao_reserves = tao_reserves
+        self.total_volume += total_dtao_received
+        
+        return total_tao_spent, total_dtao_received, successful_batches, error
+    
+    def swap_dtao_for_tao_batches(self, batches: List[Decimal], slippage_tolerance: Decimal
+                                  ) -> Tuple[Decimal, Decimal, int, Optional[str]]:
+        """
+        按顺序执行多笔卖出（与逐笔调用swap_dtao_for_tao结果一致，但不构造结果字典）
+        
+        遇到失败的批次即停止，之后的批次不再执行。与swap_tao_for_dtao_batches相同，
+        逐批检查滑点后用一次恒定乘积更新结算成功部分。
+        
+        Returns:
+            (卖出的dTAO, 获得的TAO, 成功批次数, 失败原因或None)
+        """
+        total_dtao_sold = Decimal("0")
+        successful_batches = 0
+        error = None
+        dtao_reserves = self.dtao_reserves
+        
+        for dtao_amount in batches:
+            if dtao_amount <= 0:
+                error = "交易数量必须大于0"
+                break
+            slippage = dtao_amount / (dtao_reserves + dtao_amount)
+            if slippage > slippage_tolerance:
+                error = f"滑点过大: {slippage:.4f} > {slippage_tolerance:.4f}"
+                break
+            dtao_reserves += dtao_amount
+            total_dtao_sold += dtao_amount
+            successful_batches += 1
+        
+        if successful_batches == 0:
+            return total_dtao_sold, Decimal("0"), 0, error
+        
+        k = self.dtao_reserves * self.tao_reserves
+        new_tao_reserves = k / dtao_reserves
+        total_tao_received = self.tao_reserves - new_tao_reserves
+        
+        self.dtao_reserves = dtao_reserves
+        self.tao_reserves = new_tao_reserves
+        self.total_volume += total_dtao_sold
+        
+        return total_dtao_sold, total_tao_received, successful_batches, error
+    
+    def get_hot_stats(self) -> Tuple[float, float, float, float, float]:
+        """
+        每区块记录用的轻量统计（不构建字典，不计算k值）
+        
+        Returns:
+            (dTAO储备, TAO储备, 现货价格, moving price, 累计交易量)，均为float
+        """
+        return (float(self.dtao_reserves), float(self.tao_reserves), float(self.get_spot_price()),
+                float(self.moving_price), float(self.total_volume))
+    
     def get_pool_stats(self) -> Dict[str, Any]:
         """
         获取池子统计信息
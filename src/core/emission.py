@@ -74,6 +74,7 @@ class EmissionCalculator:
         self.pending_owner_cut = {}  # 待分配owner cut
         self.pending_root_divs = {}  # 待分配root dividends
         self.pending_alpha_swapped = {}  # 待分配swapped alpha
+        self._default_root_proportion = None  # accumulate_block_emission使用的Root比例缓存
         
         # 子网状态
         self.first_emission_block = {}  # 各子网首次排放区块
@@ -771,7 +772,8 @@ class EmissionCalculator:
         self.pending_owner_cut[netuid] += owner_cut
         self.pending_root_divs[netuid] += root_divs
         
-        logger.debug(f"累积PendingEmission: 子网={netuid}, pending={pending_alpha}, owner_cut={owner_cut}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"累积PendingEmission: 子网={netuid}, pending={pending_alpha}, owner_cut={owner_cut}")
     
     def get_pending_stats(self, netuid: int) -> Dict[str, Any]:
         """
@@ -838,7 +840,8 @@ class EmissionCalculator:
             "alpha_issuance_used": alpha_issuance
         }
         
-        logger.debug(f"Owner&Root计算: owner_cut={owner_cut}, root_share={root_alpha_share}, 剩余={remaining_alpha}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Owner&Root计算: owner_cut={owner_cut}, root_share={root_alpha_share}, 剩余={remaining_alpha}")
         return result
     
     def calculate_comprehensive_emission(self,
@@ -909,6 +912,33 @@ class EmissionCalculator:
         
         return result
 
+    def accumulate_block_emission(self, netuid: int, alpha_emission_base: Decimal) -> None:
+        """
+        非epoch区块的轻量排放累积
+        
+        与calculate_comprehensive_emission在不排放的区块上的效果一致（按同样的Owner分成和Root分红
+        累积到PendingEmission），但不构建分成明细和结果字典。只应在should_drain_pending_emission
+        为False的区块上调用。
+        
+        Args:
+            netuid: 子网ID
+            alpha_emission_base: 基础Alpha排放量
+        """
+        # Root比例只取决于calculate_owner_cut_and_root_dividends的默认参数，计算一次后复用
+        root_proportion = self._default_root_proportion
+        if root_proportion is None:
+            root_proportion = self.calculate_owner_cut_and_root_dividends(alpha_emission_base)["root_proportion"]
+            self._default_root_proportion = root_proportion
+        
+        owner_cut = alpha_emission_base * self.subnet_owner_cut
+        root_alpha_share = root_proportion * alpha_emission_base * Decimal("0.5")
+        self.accumulate_pending_emission(
+            netuid=netuid,
+            alpha_out=alpha_emission_base,
+            owner_cut=owner_cut,
+            root_divs=root_alpha_share
+        )
+    
     def add_immediate_user_reward(self, current_block: int, netuid: int) -> Decimal:
         """
         🔧 新增：简化的立即奖励分配机制
@@ -2,17 +2,34 @@
 机器人对手模拟器 - 基于真实数据分析的机器人行为模拟
 """
 
-from decimal import Decimal, getcontext
+import decimal
+from decimal import Decimal
 from typing import Dict, List, Any, Optional
 import logging
+import math
 import random
+from array import array
 from enum import Enum, auto
 
-# 设置高精度计算
-getcontext().prec = 50
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# 机器人模拟依赖大量Decimal运算，需要libmpdec加速的C实现
+if not hasattr(decimal, "__libmpdec_version__"):
+    logger.warning("当前Python使用纯Python实现的decimal(_pydecimal)，机器人模拟会明显变慢，"
+                   "建议使用带_decimal扩展的CPython构建")
+
+# 机器人配置中需要解析为Decimal的字段
+DECIMAL_CONFIG_KEYS = ("entry_price", "stop_loss", "take_profit", "position_size",
+                       "price_variance", "size_variance")
+
+def _to_decimal(value: Any) -> Decimal:
+    """将配置值转换为Decimal，已解析的值直接返回"""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
 class BotType(Enum):
     """机器人类型"""
     HF_SHORT = auto()   # 高频短线 (0.3天)
@@ -30,21 +47,32 @@ class BotState(Enum):
 class TradingBot:
     """单个机器人实例"""
     
+    # 固定属性布局，减少大量机器人实例的内存占用和属性查找开销
+    __slots__ = (
+        "bot_id", "bot_type", "state",
+        "entry_price_threshold", "stop_loss_ratio", "take_profit_ratio",
+        "position_size", "hold_time_blocks",
+        "entry_price_variance", "size_variance",
+        "entry_block", "entry_price", "current_position",
+        "total_tao_spent", "total_tao_received", "trades",
+        "actual_entry_threshold", "actual_position_size",
+    )
+    
     def __init__(self, bot_id: str, bot_type: BotType, config: Dict[str, Any]):
         self.bot_id = bot_id
         self.bot_type = bot_type
         self.state = BotState.WAITING
         
         # 基础参数
-        self.entry_price_threshold = Decimal(str(config.get("entry_price", "0.003")))
-        self.stop_loss_ratio = Decimal(str(config.get("stop_loss", "-0.672")))
-        self.take_profit_ratio = Decimal(str(config.get("take_profit", "0.08")))
-        self.position_size = Decimal(str(config.get("position_size", "1000")))
+        self.entry_price_threshold = _to_decimal(config.get("entry_price", "0.003"))
+        self.stop_loss_ratio = _to_decimal(config.get("stop_loss", "-0.672"))
+        self.take_profit_ratio = _to_decimal(config.get("take_profit", "0.08"))
+        self.position_size = _to_decimal(config.get("position_size", "1000"))
         self.hold_time_blocks = int(config.get("hold_time", 2.8) * 7200)  # 转换为区块数
         
         # 添加随机性
-        self.entry_price_variance = Decimal(str(config.get("price_variance", "0.2")))  # ±20%
-        self.size_variance = Decimal(str(config.get("size_variance", "0.3")))  # ±30%
+        self.entry_price_variance = _to_decimal(config.get("price_variance", "0.2"))  # ±20%
+        self.size_variance = _to_decimal(config.get("size_variance", "0.3"))  # ±30%
         
         # 交易状态
         self.entry_block = None
@@ -69,8 +97,12 @@ class TradingBot:
         
         logger.debug(f"Bot {self.bot_id} initialized: entry@{self.actual_entry_threshold:.4f}, size={self.actual_position_size:.0f}")
     
-    def should_enter(self, current_price: Decimal, current_block: int) -> bool:
-        """判断是否应该入场"""
+    def should_enter(self, current_price: Decimal, current_block: int,
+                     entry_roll: Optional[float] = None) -> bool:
+        """判断是否应该入场
+
+        entry_roll: 由BotSwarm按区块批量抽取的随机数，未提供时单独抽取
+        """
         if self.state != BotState.WAITING:
             return False
         
@@ -81,7 +113,9 @@ class TradingBot:
         # 特殊逻辑：HF_SHORT需要看到价格快速下跌
         if self.bot_type == BotType.HF_SHORT:
             # 这里简化处理，实际可以加入更复杂的逻辑
-            return random.random() > 0.3  # 70%概率入场
+            if entry_roll is None:
+                entry_roll = random.random()
+            return entry_roll > 0.3  # 70%概率入场
         
         return True
     
@@ -112,9 +146,10 @@ class TradingBot:
         
         return False
     
-    def execute_entry(self, current_price: Decimal, current_block: int, amm_pool) -> Optional[Dict[str, Any]]:
+    def execute_entry(self, current_price: Decimal, current_block: int, amm_pool,
+                      entry_roll: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """执行入场交易"""
-        if not self.should_enter(current_price, current_block):
+        if not self.should_enter(current_price, current_block, entry_roll):
             return None
         
         # 计算买入TAO数量
@@ -182,6 +217,10 @@ class TradingBot:
         
         return None
 
+# 快照中以float64保存的机器人字段
+_SNAPSHOT_FLOAT_FIELDS = ("entry_price", "current_position", "total_tao_spent", "total_tao_received",
+                          "actual_entry_threshold", "actual_position_size")
+
 class BotSwarm:
     """机器人群体管理器"""
     
@@ -260,6 +299,15 @@ class BotSwarm:
             }
         }
         
+        # 预先解析配置模板中的Decimal字段，避免每个机器人重复解析
+        self.bot_configs_parsed = {}
+        for bot_type, template in self.bot_configs.items():
+            parsed = dict(template)
+            for key in DECIMAL_CONFIG_KEYS:
+                if key in parsed:
+                    parsed[key] = _to_decimal(parsed[key])
+            self.bot_configs_parsed[bot_type] = parsed
+        
         # 创建机器人
         self.bots: List[TradingBot] = []
         logger.info(f"BotSwarm初始化: enabled={self.enabled}, num_bots={self.num_bots}")
@@ -268,11 +316,23 @@ class BotSwarm:
         else:
             logger.warning(f"机器人未启用或数量为0: enabled={self.enabled}, num_bots={self.num_bots}")
         
+        # HF_SHORT入场随机数槽位（与self.bots一一对应，非HF_SHORT为None）
+        self._hf_short_slots: List[Optional[int]] = []
+        num_hf_short = 0
+        for bot in self.bots:
+            if bot.bot_type == BotType.HF_SHORT:
+                self._hf_short_slots.append(num_hf_short)
+                num_hf_short += 1
+            else:
+                self._hf_short_slots.append(None)
+        self._num_hf_short = num_hf_short
+        
         # 统计信息
         self.total_bot_tao_spent = Decimal("0")
         self.total_bot_tao_received = Decimal("0")
         self.active_bots = 0
         self.exited_bots = 0
+        self._total_active_position = Decimal("0")  # 持仓机器人的dTAO总量（增量维护）
     
     def _create_bots(self):
         """创建机器人实例"""
@@ -281,23 +341,26 @@ class BotSwarm:
         # 根据分布创建不同类型的机器人
         for bot_type, ratio in self.bot_distribution.items():
             num_of_type = int(self.num_bots * ratio)
+
+            # 根据总资金分配每个机器人的资金（同类型机器人相同，用float计算一次）
+            base_position_size = float(self.bot_configs[bot_type]["position_size"])
+            bot_capital_ratio = float(self.total_capital) / self.num_bots / base_position_size
+
+            # 同类型机器人共享同一份已解析的配置
+            config = self.bot_configs_parsed[bot_type].copy()
             
+            # 使用配置的入场价格（如果提供）
+            if hasattr(self, 'entry_price') and self.entry_price:
+                config["entry_price"] = self.entry_price
+            
+            # 使用配置的止损（如果提供）
+            if hasattr(self, 'stop_loss') and self.stop_loss:
+                config["stop_loss"] = -self.stop_loss
+            
+            config["position_size"] = Decimal(repr(base_position_size * bot_capital_ratio))
+
             for i in range(num_of_type):
                 bot_id = f"{bot_type.name}_{i+1}"
-                config = self.bot_configs[bot_type].copy()
-                
-                # 使用配置的入场价格（如果提供）
-                if hasattr(self, 'entry_price') and self.entry_price:
-                    config["entry_price"] = str(self.entry_price)
-                
-                # 使用配置的止损（如果提供）
-                if hasattr(self, 'stop_loss') and self.stop_loss:
-                    config["stop_loss"] = f"-{self.stop_loss}"
-                
-                # 根据总资金分配每个机器人的资金
-                bot_capital_ratio = self.total_capital / self.num_bots / Decimal(config["position_size"])
-                config["position_size"] = str(Decimal(config["position_size"]) * bot_capital_ratio)
-                
                 bot = TradingBot(bot_id, bot_type, config)
                 self.bots.append(bot)
         
@@ -310,14 +373,19 @@ class BotSwarm:
         
         transactions = []
         
-        for bot in self.bots:
+        # HF_SHORT入场门控的随机数每区块批量抽取一次
+        entry_rolls = np.random.random(self._num_hf_short).tolist() if self._num_hf_short else None
+        
+        for bot, roll_slot in zip(self.bots, self._hf_short_slots):
             # 检查入场
             if bot.state == BotState.WAITING:
-                entry_tx = bot.execute_entry(current_price, current_block, amm_pool)
+                entry_roll = entry_rolls[roll_slot] if roll_slot is not None else None
+                entry_tx = bot.execute_entry(current_price, current_block, amm_pool, entry_roll)
                 if entry_tx:
                     transactions.append(entry_tx)
                     self.active_bots += 1
                     self.total_bot_tao_spent += entry_tx["tao_spent"]
+                    self._total_active_position += entry_tx["dtao_received"]
             
             # 检查退出
             elif bot.state == BotState.HOLDING:
@@ -327,6 +395,7 @@ class BotSwarm:
                     self.active_bots -= 1
                     self.exited_bots += 1
                     self.total_bot_tao_received += exit_tx["tao_received"]
+                    self._total_active_position -= exit_tx["dtao_sold"]
         
         return transactions
     
@@ -362,7 +431,70 @@ class BotSwarm:
     
     def get_active_positions(self) -> Decimal:
         """获取所有机器人的总持仓"""
-        return sum(bot.current_position for bot in self.bots if bot.state == BotState.HOLDING)
+        return self._total_active_position
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        导出所有机器人状态的紧凑快照（用于日志/回放）
+
+        每个字段按机器人顺序打包为连续的字节缓冲区，Decimal字段以float64保存，
+        交易记录(trades)不包含在快照中。
+        """
+        n = len(self.bots)
+        state = array("B", bytes(n))
+        entry_block = array("q", [-1]) * n
+        float_fields = {name: array("d", bytes(8 * n)) for name in _SNAPSHOT_FLOAT_FIELDS}
+        
+        for i, bot in enumerate(self.bots):
+            state[i] = bot.state.value
+            if bot.entry_block is not None:
+                entry_block[i] = bot.entry_block
+            for name, values in float_fields.items():
+                value = getattr(bot, name)
+                values[i] = float(value) if value is not None else math.nan
+        
+        snapshot = {
+            "num_bots": n,
+            "state": state.tobytes(),
+            "entry_block": entry_block.tobytes(),
+            "active_bots": self.active_bots,
+            "exited_bots": self.exited_bots,
+            "total_bot_tao_spent": str(self.total_bot_tao_spent),
+            "total_bot_tao_received": str(self.total_bot_tao_received),
+            "total_active_position": str(self._total_active_position),
+        }
+        for name, values in float_fields.items():
+            snapshot[name] = values.tobytes()
+        return snapshot
+    
+    def restore(self, snapshot: Dict[str, Any]):
+        """从snapshot()导出的快照恢复机器人状态（机器人数量和顺序需一致）"""
+        n = snapshot["num_bots"]
+        if n != len(self.bots):
+            raise ValueError(f"快照机器人数量不匹配: {n} != {len(self.bots)}")
+        
+        state = array("B")
+        state.frombytes(snapshot["state"])
+        entry_block = array("q")
+        entry_block.frombytes(snapshot["entry_block"])
+        float_fields = {}
+        for name in _SNAPSHOT_FLOAT_FIELDS:
+            values = array("d")
+            values.frombytes(snapshot[name])
+            float_fields[name] = values
+        
+        for i, bot in enumerate(self.bots):
+            bot.state = BotState(state[i])
+            bot.entry_block = entry_block[i] if entry_block[i] >= 0 else None
+            for name, values in float_fields.items():
+                value = values[i]
+                setattr(bot, name, None if math.isnan(value) else Decimal(repr(value)))
+        
+        self.active_bots = snapshot["active_bots"]
+        self.exited_bots = snapshot["exited_bots"]
+        self.total_bot_tao_spent = Decimal(snapshot["total_bot_tao_spent"])
+        self.total_bot_tao_received = Decimal(snapshot["total_bot_tao_received"])
+        self._total_active_position = Decimal(snapshot["total_active_position"])
     
     def get_active_stats(self) -> Dict[str, Any]:
         """获取当前活跃状态 - 兼容智能机器人接口"""
@@ -4,12 +4,19 @@
 """
 
 from decimal import Decimal, getcontext
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Tuple
 import logging
 import json
+import csv
 import sqlite3
+import queue
+import threading
 from pathlib import Path
 import os
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 # 设置高精度计算
 getcontext().prec = 50
@@ -18,6 +25,7 @@ getcontext().prec = 50
 from ..core.amm_pool import AMMPool
 from ..core.emission import EmissionCalculator
 from ..utils.config_schema import UnifiedConfig
+from ..utils.batch_trader import BatchTrader
 from ..utils.constants import (
     DEFAULT_ALPHA_BASE, 
     DEFAULT_HALVING_TIME,
@@ -40,9 +48,94 @@ from .smart_bot_manager import SmartBotManager
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class _EmissionParams:
+    """逐区块emission计算使用的数值参数快照（初始化时从配置解析一次）"""
+    __slots__ = ("other_subnets_avg_price", "user_reward_share", "tao_per_block", "tao_per_block_f",
+                 "dtao_per_block", "validator_sell_ratio", "ramp_up_epochs")
+    
+    other_subnets_avg_price: Decimal
+    user_reward_share: Decimal
+    tao_per_block: Decimal
+    tao_per_block_f: float
+    dtao_per_block: Decimal      # 每区块直接注入AMM池的dTAO
+    validator_sell_ratio: Decimal  # 验证者立即抛售比例
+    ramp_up_epochs: int          # 前N个Epoch线性增长
+
+
+def _write_json(path: str, data: Any, **kwargs) -> None:
+    """把data以缩进格式写入JSON文件（供_save_results在后台线程调用）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, **kwargs)
+
+
+def _emission_math(current_epoch: int, ramp_up_epochs: int, emission_share: float,
+                   tao_per_block: float, immunity_passed: bool) -> Tuple[float, float]:
+    """
+    每区块emission的标量计算（纯float）
+    
+    Returns:
+        (ramp_up_factor, tao_injected)
+    """
+    ramp_up_factor = current_epoch / ramp_up_epochs
+    if ramp_up_factor > 1.0:
+        ramp_up_factor = 1.0
+    tao_injected = tao_per_block * emission_share if immunity_passed else 0.0
+    return ramp_up_factor, tao_injected
+
+
 class EnhancedSubnetSimulator:
     """增强版子网模拟器，支持智能机器人和增强策略"""
     
+    # 区块历史矩阵history_np的列索引
+    _HFIELDS = {
+        "price": 0,       # 现货价格
+        "mprice": 1,      # moving price
+        "eshare": 2,      # emission份额
+        "dtao": 3,        # 池子dTAO储备
+        "tao": 4,         # 池子TAO储备
+        "tao_inj": 5,     # TAO注入量
+        "pending": 6      # 待分配emission
+    }
+    
+    # _generate_summary中机器人明细统计的结构化数组类型
+    _BOT_SUMMARY_DTYPE = np.dtype([
+        ("initial", np.float64), ("current", np.float64), ("pl", np.float64),
+        ("trades", np.int64), ("exited", np.bool_), ("active", np.bool_)
+    ])
+    
+    # 导出block_data.csv时每次转换/写出的行数
+    _CSV_CHUNK_ROWS = 10000
+    
+    # 区块数据中history_np之外的列（记录在block_extra_np中）
+    _EXTRA_FIELDS = (
+        "strategy_tao", "strategy_dtao", "active_bots",
+        "cumulative_tao_emissions", "cumulative_dtao_rewards"
+    )
+    
+    # 批量写入使用的INSERT语句（固定SQL，参数为元组）
+    _INSERT_BLOCK_SQL = """
+        INSERT INTO block_data (
+            block, epoch, day, spot_price, moving_price, 
+            emission_share, dtao_reserves, tao_reserves,
+            strategy_tao, strategy_dtao, active_bots, 
+            tao_injected, pending_emission, cumulative_tao_emissions,
+            cumulative_dtao_rewards, timestamp
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+    """
+    _INSERT_TRANSACTION_SQL = """
+        INSERT INTO transactions (
+            block, type, actor, tao_amount, dtao_amount, 
+            price, details, timestamp
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+    """
+    _INSERT_SQUEEZE_SQL = """
+        INSERT INTO squeeze_operations (
+            block, mode, cost_tao, price_before, price_after,
+            bots_affected, success, details, timestamp
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+    """
+    
     def __init__(self, config: UnifiedConfig, output_dir: Optional[str] = None):
         """
         初始化模拟器
@@ -54,6 +147,9 @@ class EnhancedSubnetSimulator:
         self.config = config
         self.output_dir = output_dir or "test_results/simulation"
         
+        # 逐区块的debug日志只在创建时已开启DEBUG级别时才格式化
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+        
         # 创建输出目录
         os.makedirs(self.output_dir, exist_ok=True)
         
@@ -87,6 +183,16 @@ class EnhancedSubnetSimulator:
         self.tempo_blocks = self.config.simulation.tempo_blocks
         self.total_blocks = int(self.simulation_days * self.blocks_per_day)
         
+        # 区块数据存储方式：sqlite逐区块写入block_data表（便于交互查询），npz只在结束时导出数组
+        self.storage_mode = getattr(self.config.simulation, "storage_mode", "sqlite")
+        # 关闭后squeeze_operations.details写NULL，省去每次绞杀操作的json.dumps
+        self.persist_details = getattr(self.config.simulation, "persist_details", True)
+        # 关闭后不构造block_result["batch_trade_info"]（各批次大小列表）
+        self.record_batch_info = getattr(self.config.simulation, "record_batch_info", True)
+        # 区块记录中策略持仓统计的采样间隔（1=每个区块，参数扫描时可调大）
+        self.portfolio_sample_interval = max(1, int(getattr(self.config.simulation, "portfolio_sample_interval", 1)))
+        self._portfolio_stats: Dict[str, Any] = {}
+        
         # 子网参数
         self.subnet_activation_block = 0
         self.immunity_blocks = self.config.subnet.immunity_blocks
@@ -98,6 +204,21 @@ class EnhancedSubnetSimulator:
         self.user_reward_share = Decimal(self.config.strategy.user_reward_share) / Decimal("100")
         self.external_sell_pressure = Decimal(self.config.strategy.external_sell_pressure) / Decimal("100")
         
+        # 每区块不变的emission参数快照（float仅用于记录，池子和策略状态仍为Decimal）
+        self._emission_params = _EmissionParams(
+            other_subnets_avg_price=self.other_subnets_avg_price,
+            user_reward_share=self.user_reward_share,
+            tao_per_block=Decimal(str(self.config.simulation.tao_per_block)),
+            tao_per_block_f=float(self.config.simulation.tao_per_block),
+            dtao_per_block=Decimal("1.0"),
+            validator_sell_ratio=Decimal("0.41"),
+            ramp_up_epochs=100
+        )
+        self._ramp_up_epoch = -1
+        self._ramp_up_dtao_to_pending = Decimal("0")
+        self._emission_share_key = None  # 上次计算emission份额的输入
+        self._emission_share = (Decimal("0"), 0.0)  # 上次的份额(Decimal, float)
+        
         # 状态追踪
         self.current_block = 0
         self.current_day = 0
@@ -121,16 +242,29 @@ class EnhancedSubnetSimulator:
         }
         self.emission_calculator = EmissionCalculator(emission_config)
         
-        # 数据记录器
-        self.history = {
-            "blocks": [],
-            "prices": [],
-            "moving_prices": [],
-            "emissions": [],
-            "pool_reserves": [],
-            "strategy_actions": [],
-            "bot_actions": [],
-            "squeeze_operations": []
+        # 策略分批交易器（所有区块共用）
+        self.batch_trader = BatchTrader(
+            max_slippage=Decimal("0.05"),  # 5%最大滑点
+            fast_math=getattr(self.config.simulation, "fast_math", False)
+        )
+        self.batch_slippage_tolerance = Decimal("0.06")  # 给6%的容差，确保5%的批次能通过
+        
+        # 数据记录器：按区块预分配的历史矩阵（列见_HFIELDS），按区块号整行写入
+        # 列优先存储（每列连续），汇总统计和导出时按列读取不需要跨步访问
+        self.hist_blocks = np.zeros(self.total_blocks, dtype=np.int32)
+        self.history_np = np.zeros((self.total_blocks, len(self._HFIELDS)), dtype=np.float64, order="F")
+        
+        # 每个区块复用的结果字典（由_process_block原地更新）
+        self._block_result = {
+            "block": 0,
+            "price": 0.0,
+            "moving_price": 0.0,
+            "emission": {},
+            "strategy": {},
+            "bots": {},
+            "squeeze": None,
+            "pool": {"dtao": 0.0, "tao": 0.0},
+            "batch_trade_info": None
         }
         
     def _init_strategy(self):
@@ -270,12 +404,36 @@ class EnhancedSubnetSimulator:
             
         else:
             raise ValueError(f"未知策略类型: {strategy_type}")
+        
+        # 预先解析策略接口，避免每个区块重复hasattr探测
+        self._is_three_phase_enhanced = strategy_type == "three_phase_enhanced"
+        self._is_tempo_sell = isinstance(self.strategy, TempoSellStrategy)
+        # 策略决策动作 -> 执行方法（未列出的动作不交易）
+        self._action_dispatch = {"buy": self._exec_buy, "sell": self._exec_sell}
+        self._strategy_update = getattr(self.strategy, 'update', None)
+        self._strategy_should_transact = getattr(self.strategy, 'should_transact', None)
+        self._strategy_update_portfolio = getattr(self.strategy, 'update_portfolio', None)
+        self._strategy_add_tao_emissions = getattr(self.strategy, 'add_tao_emissions', None)
+        self._strategy_add_dtao_rewards = getattr(self.strategy, 'add_dtao_rewards', None)
+        self._strategy_get_portfolio_stats = getattr(self.strategy, 'get_portfolio_stats', None)
+        # 绞杀操作只对增强建筑师策略生效
+        self._strategy_check_squeeze = (
+            getattr(self.strategy, 'check_squeeze_opportunity', None)
+            if isinstance(self.strategy, EnhancedArchitectStrategy) else None
+        )
             
     def _init_bots(self):
         """初始化机器人模拟"""
         self.bot_manager = None
         self.use_smart_bots = False
         
+        # 未启用机器人时每个区块共用的结果（只读）
+        self._empty_bot_result = {"active": 0, "trades": 0, "volume": 0}
+        
+        # get_active_stats()在同一区块内的缓存（见_get_bot_stats）
+        self._bot_stats_cache = None
+        self._bot_stats_block = -1
+        
         if self.config.bots and self.config.bots.enabled:
             # 检查是否使用智能机器人
             self.use_smart_bots = getattr(self.config.bots, 'use_smart_bots', False)
@@ -298,14 +456,47 @@ class EnhancedSubnetSimulator:
                 # 使用标准机器人
                 self.bot_manager = BotManager(bot_config)
                 logger.info("启用标准机器人模拟")
+        
+        # 三阶段增强策略需要机器人管理器引用
+        if self._is_three_phase_enhanced and self.bot_manager and hasattr(self.strategy, 'set_bot_manager'):
+            self.strategy.set_bot_manager(self.bot_manager)
+        
+        # 未启用机器人时，每个区块直接返回空结果
+        if self.bot_manager is None:
+            self._process_bots = self._process_bots_disabled
                 
     def _init_data_recording(self):
         """初始化数据记录"""
         # SQLite数据库
         db_path = os.path.join(self.output_dir, "simulation_data.db")
-        self.db_conn = sqlite3.connect(db_path)
+        # 模拟循环期间由后台写线程使用同一连接（两个线程不会同时访问，见_start_db_writer）
+        self.db_conn = sqlite3.connect(db_path, check_same_thread=False)
+        
+        # 模拟数据可重新生成，放宽同步要求以减少磁盘IO
+        self.db_conn.execute("PRAGMA journal_mode=WAL")
+        self.db_conn.execute("PRAGMA synchronous=NORMAL")
+        self.db_conn.execute("PRAGMA temp_store=MEMORY")
+        self.db_conn.execute("PRAGMA cache_size=-65536")
         self._create_tables()
         
+        # 批量写入复用同一个游标
+        self._db_cursor = self.db_conn.cursor()
+        
+        # 待写入的记录缓冲，每个tempo批量写入一次
+        self._block_rows: List[tuple] = []
+        self._transaction_rows: List[tuple] = []
+        self._squeeze_rows: List[tuple] = []
+        
+        # 后台写线程（只在run_simulation的区块循环期间运行）
+        self._db_queue: "queue.Queue[Optional[Tuple[List[tuple], List[tuple], List[tuple]]]]" = queue.Queue(maxsize=16)
+        self._db_writer: Optional[threading.Thread] = None
+        self._db_writer_error: Optional[BaseException] = None
+        
+        # history_np之外的区块数据列（见_EXTRA_FIELDS），导出CSV/npz时与history_np一起按列读取
+        self.block_extra_np = np.zeros(
+            (self.total_blocks, len(self._EXTRA_FIELDS)), dtype=np.float64, order="F"
+        )
+        
     def _create_tables(self):
         """创建数据库表"""
         cursor = self.db_conn.cursor()
@@ -362,6 +553,10 @@ class EnhancedSubnetSimulator:
                 timestamp TEXT
             )
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_squeeze_success_mode
+            ON squeeze_operations(success, mode)
+        """)
         
         self.db_conn.commit()
         
@@ -377,33 +572,57 @@ class EnhancedSubnetSimulator:
         """
         logger.info(f"开始模拟: {self.total_blocks} 区块 ({self.simulation_days} 天)")
         
-        for block in range(self.total_blocks):
-            self.current_block = block
-            self.current_day = block // self.blocks_per_day
-            self.current_epoch = block // self.tempo_blocks
-            
-            # 处理区块
-            block_result = self._process_block()
-            
-            # 记录数据
-            self._record_block_data(block_result)
+        # 天数/Epoch用边界计数器递推，避免每个区块做整除
+        self.current_day = 0
+        self.current_epoch = 0
+        next_day_block = self.blocks_per_day
+        next_epoch_block = self.tempo_blocks
+        
+        # 区块循环期间数据库写入交给后台线程
+        self._start_db_writer()
+        try:
+            for block in range(self.total_blocks):
+                self.current_block = block
+                if block == next_day_block:
+                    self.current_day += 1
+                    next_day_block += self.blocks_per_day
+                if block == next_epoch_block:
+                    self.current_epoch += 1
+                    next_epoch_block += self.tempo_blocks
+                
+                # 处理区块
+                block_result = self._process_block()
+                
+                # 记录数据
+                self._record_block_data(block_result)
+                
+                # 每个tempo批量写入一次数据库
+                tempo_boundary = block % self.tempo_blocks == 0
+                if tempo_boundary:
+                    self._flush_records()
+                
+                # 进度回调 - 每个tempo调用一次，或者有重要事件时
+                should_callback = tempo_boundary or (block_result['strategy'].get('action') != 'none')
+                if progress_callback and should_callback:
+                    # 构建state信息以匹配预期格式
+                    state = {
+                        'current_price': block_result['price'],
+                        'pool_stats': {
+                            'tao_reserves': block_result['pool']['tao'],
+                            'dtao_reserves': block_result['pool']['dtao']
+                        },
+                        'decision': block_result['strategy'].get('action', ''),
+                        'amount': block_result['strategy'].get('amount', 0),
+                        'active_bots': block_result['bots'].get('active', 0),
+                        'strategy_phase': getattr(self.strategy, 'current_phase', {}).value if hasattr(self.strategy, 'current_phase') and hasattr(self.strategy.current_phase, 'value') else ''
+                    }
+                    progress_callback(block, self.total_blocks, state)
             
-            # 进度回调 - 每个tempo调用一次，或者有重要事件时
-            should_callback = (block % self.tempo_blocks == 0) or (block_result['strategy'].get('action') != 'none')
-            if progress_callback and should_callback:
-                # 构建state信息以匹配预期格式
-                state = {
-                    'current_price': block_result['price'],
-                    'pool_stats': {
-                        'tao_reserves': block_result['pool']['tao'],
-                        'dtao_reserves': block_result['pool']['dtao']
-                    },
-                    'decision': block_result['strategy'].get('action', ''),
-                    'amount': block_result['strategy'].get('amount', 0),
-                    'active_bots': block_result['bots'].get('active', 0),
-                    'strategy_phase': getattr(self.strategy, 'current_phase', {}).value if hasattr(self.strategy, 'current_phase') and hasattr(self.strategy.current_phase, 'value') else ''
-                }
-                progress_callback(block, self.total_blocks, state)
+            # 写入剩余的缓冲记录
+            self._flush_records()
+        finally:
+            # 等待后台写线程完成（之后的汇总需要查询数据库）
+            self._stop_db_writer()
                 
         # 生成最终报告
         summary = self._generate_summary()
@@ -415,20 +634,25 @@ class EnhancedSubnetSimulator:
         return summary
         
     def _process_block(self) -> Dict[str, Any]:
-        """处理单个区块"""
+        """
+        处理单个区块
+        
+        返回的结果字典在每个区块复用，只在下一个区块处理前有效
+        """
         # 获取当前价格
         current_price = self.amm_pool.get_spot_price()
+        current_price_f = float(current_price)  # 本区块内复用，避免重复Decimal->float转换
         
         # 1. 处理emission
         emission_result = self._process_emission()
         
         # 传递dTAO奖励给策略
         user_dtao_rewards = emission_result.get('user_dtao_rewards', Decimal('0'))
-        if user_dtao_rewards > 0 and hasattr(self.strategy, 'add_dtao_rewards'):
-            self.strategy.add_dtao_rewards(user_dtao_rewards)
+        if user_dtao_rewards > 0 and self._strategy_add_dtao_rewards:
+            self._strategy_add_dtao_rewards(user_dtao_rewards)
         
         # 2. 执行策略交易
-        strategy_result = self._execute_strategy(current_price)
+        strategy_result = self._execute_strategy(current_price, current_price_f)
         
         # 3. 处理机器人交易
         bot_result = self._process_bots(current_price)
@@ -439,58 +663,67 @@ class EnhancedSubnetSimulator:
         # 5. 检查绞杀操作（如果使用增强策略）
         squeeze_result = self._check_squeeze_operations(current_price)
         
-        # 组装结果
-        block_result = {
-            "block": self.current_block,
-            "price": float(current_price),
-            "moving_price": float(self.amm_pool.moving_price),
-            "emission": emission_result,
-            "strategy": strategy_result,
-            "bots": bot_result,
-            "squeeze": squeeze_result,
-            "pool": {
-                "dtao": float(self.amm_pool.dtao_reserves),
-                "tao": float(self.amm_pool.tao_reserves)
-            }
-        }
-        
-        # 如果有批次交易信息，添加到结果中
-        if strategy_result.get("batch_trade_info"):
-            block_result["batch_trade_info"] = strategy_result["batch_trade_info"]
+        # 组装结果（原地更新复用的字典）
+        block_result = self._block_result
+        block_result["block"] = self.current_block
+        block_result["price"] = current_price_f
+        block_result["moving_price"] = float(self.amm_pool.moving_price)
+        block_result["emission"] = emission_result
+        block_result["strategy"] = strategy_result
+        block_result["bots"] = bot_result
+        block_result["squeeze"] = squeeze_result
+        pool = block_result["pool"]
+        pool["dtao"] = float(self.amm_pool.dtao_reserves)
+        pool["tao"] = float(self.amm_pool.tao_reserves)
+        
+        # 批次交易信息（无则为None）
+        block_result["batch_trade_info"] = strategy_result.get("batch_trade_info")
             
         return block_result
         
     def _process_emission(self) -> Dict[str, Any]:
         """处理emission注入 - 基于原版模拟器的正确实现"""
         # 免疫期内不处理TAO注入，但dTAO仍然产生
-        current_epoch = self.current_block // self.tempo_blocks
+        current_epoch = self.current_epoch
+        params = self._emission_params
         
         # 1. dTAO产生机制：每个区块产生2个dTAO
         # - 1个直接注入AMM池增加流动性
         # - 1个进入待分配奖励池
-        dtao_to_pool = Decimal("1.0")
-        dtao_to_pending = Decimal("1.0")
-        
-        # 前100个Epoch的线性增长机制（仅影响待分配部分）
-        ramp_up_epochs = 100
-        ramp_up_factor = min(Decimal(str(current_epoch)) / Decimal(str(ramp_up_epochs)), Decimal("1.0"))
-        dtao_to_pending = dtao_to_pending * ramp_up_factor
+        dtao_to_pool = params.dtao_per_block
         
         # 注入dTAO到AMM池（增加流动性）
         if dtao_to_pool > 0:
-            self.amm_pool.inject_dtao_direct(dtao_to_pool)
-            logger.debug(f"区块{self.current_block}: 向AMM池注入{dtao_to_pool} dTAO")
+            self.amm_pool.inject_dtao_direct(dtao_to_pool, return_details=False)
+            if self._debug:
+                logger.debug(f"区块{self.current_block}: 向AMM池注入{dtao_to_pool} dTAO")
         
         # 2. 计算emission份额
+        # 份额只取决于moving price和是否过了免疫期（免疫期内恒为0），输入不变时复用上次结果
+        immunity_passed = self.current_block >= self.immunity_blocks
         current_moving_price = self.amm_pool.moving_price
-        total_moving_prices = self.other_subnets_avg_price + current_moving_price
+        share_key = (current_moving_price if immunity_passed else None, immunity_passed)
+        if share_key != self._emission_share_key:
+            total_moving_prices = params.other_subnets_avg_price + current_moving_price
+            emission_share = self.emission_calculator.calculate_subnet_emission_share(
+                subnet_moving_price=current_moving_price,
+                total_moving_prices=total_moving_prices,
+                current_block=self.current_block,
+                subnet_activation_block=self.subnet_activation_block
+            )
+            self._emission_share_key = share_key
+            self._emission_share = (emission_share, float(emission_share))
+        emission_share, emission_share_f = self._emission_share
         
-        emission_share = self.emission_calculator.calculate_subnet_emission_share(
-            subnet_moving_price=current_moving_price,
-            total_moving_prices=total_moving_prices,
-            current_block=self.current_block,
-            subnet_activation_block=self.subnet_activation_block
+        # 前100个Epoch的线性增长机制（仅影响待分配部分）
+        # 标量在float中计算，增长因子每个Epoch只转换一次Decimal
+        ramp_up_factor, tao_injected_f = _emission_math(
+            current_epoch, params.ramp_up_epochs, emission_share_f, params.tao_per_block_f, immunity_passed
         )
+        if current_epoch != self._ramp_up_epoch:
+            self._ramp_up_epoch = current_epoch
+            self._ramp_up_dtao_to_pending = Decimal(repr(ramp_up_factor))
+        dtao_to_pending = self._ramp_up_dtao_to_pending
         
         # 3. 使用calculate_comprehensive_emission处理完整emission逻辑
         # 这个方法会自动处理：
@@ -505,21 +738,22 @@ class EnhancedSubnetSimulator:
         )
         
         # 4. 处理TAO注入（基于市场份额）
-        tao_per_block = Decimal(str(self.config.simulation.tao_per_block))
-        tao_injection = tao_per_block * emission_share
+        tao_injection = params.tao_per_block * emission_share
         
-        if self.current_block >= self.immunity_blocks and tao_injection > 0:
-            self.amm_pool.inject_tao(tao_injection)
-            logger.debug(f"区块{self.current_block}: 市场平衡注入{tao_injection} TAO")
+        if immunity_passed and tao_injection > 0:
+            self.amm_pool.inject_tao(tao_injection, return_details=False)
+            if self._debug:
+                logger.debug(f"区块{self.current_block}: 市场平衡注入{tao_injection} TAO")
             
             # 给策略分配TAO emissions（用户控制59%）
-            user_tao_emissions = tao_injection * self.user_reward_share
+            user_tao_emissions = tao_injection * params.user_reward_share
             self.cumulative_tao_emissions += user_tao_emissions
             
             # 通知策略有TAO emissions
-            if hasattr(self.strategy, 'add_tao_emissions'):
-                self.strategy.add_tao_emissions(user_tao_emissions)
-                logger.debug(f"分配TAO emissions给策略: {user_tao_emissions} TAO")
+            if self._strategy_add_tao_emissions:
+                self._strategy_add_tao_emissions(user_tao_emissions)
+                if self._debug:
+                    logger.debug(f"分配TAO emissions给策略: {user_tao_emissions} TAO")
         
         # 5. 处理dTAO奖励分配
         dtao_rewards_distributed = Decimal("0")
@@ -531,30 +765,33 @@ class EnhancedSubnetSimulator:
             dtao_rewards_distributed = drain_result.get("pending_alpha_drained", Decimal("0"))
             
             # 计算用户获得的dTAO奖励（59%）
-            user_dtao_rewards = dtao_rewards_distributed * self.user_reward_share
+            user_dtao_rewards = dtao_rewards_distributed * params.user_reward_share
             
             # 41%验证者立即抛售
-            validator_sell = dtao_rewards_distributed * Decimal("0.41")
+            validator_sell = dtao_rewards_distributed * params.validator_sell_ratio
             if validator_sell > 0:
                 self.amm_pool.swap_dtao_for_tao(validator_sell)
-                logger.debug(f"验证者立即抛售: {validator_sell} dTAO")
+                if self._debug:
+                    logger.debug(f"验证者立即抛售: {validator_sell} dTAO")
             
-            logger.info(f"区块{self.current_block}: PendingEmission排放 {dtao_rewards_distributed} dTAO, 用户份额: {user_dtao_rewards}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("区块%s: PendingEmission排放 %s dTAO, 用户份额: %s",
+                            self.current_block, dtao_rewards_distributed, user_dtao_rewards)
         
         return {
             "dtao_to_pool": float(dtao_to_pool),
-            "dtao_to_pending": float(dtao_to_pending),
-            "tao_injected": float(tao_injection) if self.current_block >= self.immunity_blocks else 0,
-            "emission_share": float(emission_share),
+            "dtao_to_pending": ramp_up_factor,
+            "tao_injected": tao_injected_f,
+            "emission_share": emission_share_f,
             "dtao_rewards_distributed": float(dtao_rewards_distributed),
             "user_dtao_rewards": user_dtao_rewards,  # 返回Decimal类型给策略使用
-            "price_after": float(self.amm_pool.get_spot_price())
+            "price_after": self.amm_pool.get_spot_price_f()
         }
         
     def _process_bots(self, current_price: Decimal) -> Dict[str, Any]:
         """处理机器人交易"""
         if not self.bot_manager:
-            return {"active": 0, "trades": 0, "volume": 0}
+            return self._empty_bot_result
             
         # 更新机器人状态
         bot_update_result = self.bot_manager.update(
@@ -582,23 +819,16 @@ class EnhancedSubnetSimulator:
             "exits_successful": bot_update_result.get("exits_successful", 0)
         }
         
-    def _check_squeeze_operations(self, current_price: Decimal) -> Dict[str, Any]:
-        """检查绞杀操作（如果使用增强策略）"""
-        # 只有增强策略才有绞杀操作
-        if hasattr(self.strategy, 'get_squeeze_stats'):
-            return self.strategy.get_squeeze_stats()
-        return {"operations": 0, "victims": 0, "profit": 0}
+    def _process_bots_disabled(self, current_price: Decimal) -> Dict[str, Any]:
+        """未启用机器人时的_process_bots（在_init_bots中绑定）"""
+        return self._empty_bot_result
         
-    def _execute_strategy(self, current_price: Decimal) -> Dict[str, Any]:
-        """执行策略交易"""
+    def _execute_strategy(self, current_price: Decimal, current_price_f: float) -> Dict[str, Any]:
+        """执行策略交易（current_price_f为current_price的float值，由_process_block传入）"""
         # 特殊处理三阶段策略
-        if self.config.strategy.type == "three_phase_enhanced":
-            # 设置机器人管理器引用
-            if hasattr(self.strategy, 'set_bot_manager') and self.bot_manager:
-                self.strategy.set_bot_manager(self.bot_manager)
-            
-            # 调用三阶段策略的update方法
-            strategy_result = self.strategy.update(
+        if self._is_three_phase_enhanced:
+            # 调用三阶段策略的update方法（机器人管理器引用已在_init_bots中设置）
+            strategy_result = self._strategy_update(
                 current_block=self.current_block,
                 amm_pool=self.amm_pool,
                 emission_system=self.emission_calculator
@@ -615,7 +845,7 @@ class EnhancedSubnetSimulator:
                     elif intervention_type in ["sell_to_moderate", "squeeze_stop_loss", "squeeze_pump_dump"]:
                         # 对于卖出干预，需要估算dTAO数量
                         # 简化处理：假设策略有足够的dTAO
-                        dtao_amount = float(action["amount"]) / float(current_price)
+                        dtao_amount = float(action["amount"]) / current_price_f
                         decision = {"action": "sell", "dtao_amount": dtao_amount}
                     elif intervention_type == "squeeze_oscillate":
                         # 震荡可能是买入或卖出，这里简化为买入
@@ -629,9 +859,9 @@ class EnhancedSubnetSimulator:
                     break
         
         # 根据策略类型调用不同的方法
-        elif hasattr(self.strategy, 'should_transact'):
+        elif self._strategy_should_transact:
             # 新版策略接口
-            decision = self.strategy.should_transact(
+            decision = self._strategy_should_transact(
                 current_price=current_price,
                 current_block=self.current_block,
                 day=self.current_day,
@@ -644,136 +874,126 @@ class EnhancedSubnetSimulator:
         result = {
             "action": decision.get("action", "none"),
             "amount": 0,
-            "price": float(current_price),
+            "price": current_price_f,
             "batch_trade_info": None  # 初始化批次交易信息
         }
         
+        # 按动作分派执行交易（hold/none等无需交易的动作直接跳过）
+        handler = self._action_dispatch.get(result["action"])
+        if handler is not None:
+            handler(decision, current_price, result)
+            
+        return result
+        
+    def _exec_buy(self, decision: Dict[str, Any], current_price: Decimal, result: Dict[str, Any]):
+        """执行策略买入决策，结果写入result"""
+        if not decision.get("tao_amount", 0) > 0:
+            return
+            
         # Debug logging
-        if decision.get("action") == "buy" and decision.get("tao_amount", 0) > 0:
+        if self._debug:
             logger.debug(f"Buy decision: {decision}, current_price: {current_price}")
         
-        # 执行交易
-        if decision.get("action") == "buy" and decision.get("tao_amount", 0) > 0:
-            tao_amount = Decimal(str(decision["tao_amount"]))
-            logger.info(f"Attempting buy: tao_amount={tao_amount}, pool_tao={self.amm_pool.tao_reserves}, pool_dtao={self.amm_pool.dtao_reserves}")
-            
-            # 使用分批交易来控制滑点
-            from ..utils.batch_trader import BatchTrader
-            batch_trader = BatchTrader(max_slippage=Decimal("0.05"))  # 5%最大滑点
-            
-            # 拆分订单
-            batches = batch_trader.split_buy_order(
-                tao_amount,
-                self.amm_pool.tao_reserves,
-                self.amm_pool.dtao_reserves
-            )
-            
-            total_tao_spent = Decimal("0")
-            total_dtao_received = Decimal("0")
-            successful_batches = 0
-            
-            # 执行每个批次
-            for batch_tao in batches:
-                swap_result = self.amm_pool.swap_tao_for_dtao(
-                    batch_tao, 
-                    slippage_tolerance=Decimal("0.06")  # 给6%的容差，确保5%的批次能通过
+        tao_amount = decision["tao_amount"]
+        if not isinstance(tao_amount, Decimal):
+            tao_amount = Decimal(str(tao_amount))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Attempting buy: tao_amount=%s, pool_tao=%s, pool_dtao=%s",
+                        tao_amount, self.amm_pool.tao_reserves, self.amm_pool.dtao_reserves)
+        
+        # 使用分批交易来控制滑点，拆分订单
+        batches = self.batch_trader.split_buy_order(
+            tao_amount,
+            self.amm_pool.tao_reserves,
+            self.amm_pool.dtao_reserves
+        )
+        
+        # 依次执行每个批次，某个批次失败则停止后续批次
+        total_tao_spent, total_dtao_received, successful_batches, error = \
+            self.amm_pool.swap_tao_for_dtao_batches(batches, self.batch_slippage_tolerance)
+        if error:
+            logger.warning("Batch buy failed: %s, batch_size=%s", error, batches[successful_batches])
+        
+        # 如果至少有一个批次成功
+        if successful_batches > 0:
+            # 更新策略投资组合
+            if self._strategy_update_portfolio:
+                self._strategy_update_portfolio(
+                    tao_spent=total_tao_spent,
+                    dtao_received=total_dtao_received
                 )
-                if swap_result["success"]:
-                    total_tao_spent += batch_tao
-                    total_dtao_received += swap_result["dtao_received"]
-                    successful_batches += 1
-                else:
-                    logger.warning(f"Batch buy failed: {swap_result}, batch_size={batch_tao}")
-                    break  # 如果某个批次失败，停止后续批次
-            
-            # 如果至少有一个批次成功
-            if successful_batches > 0:
-                # 更新策略投资组合
-                if hasattr(self.strategy, 'update_portfolio'):
-                    self.strategy.update_portfolio(
-                        tao_spent=total_tao_spent,
-                        dtao_received=total_dtao_received
-                    )
-                result["amount"] = float(total_tao_spent)
-                self._record_transaction("buy", "strategy", total_tao_spent, total_dtao_received, current_price)
-                logger.info(f"Buy completed: {successful_batches} batches, total_spent={total_tao_spent}, total_received={total_dtao_received}")
-                
-                # 记录分批交易信息
-                if len(batches) > 1:
-                    result["batch_trade_info"] = {
-                        "type": "buy",
-                        "total_amount": float(total_tao_spent),
-                        "batch_count": successful_batches,
-                        "batch_sizes": [float(b) for b in batches[:successful_batches]],
-                        "max_slippage": 0.05  # 设定的最大滑点
-                    }
-            else:
-                logger.warning(f"All buy batches failed for amount={tao_amount}")
-                
-        elif decision.get("action") == "sell" and decision.get("dtao_amount", 0) > 0:
-            dtao_amount = Decimal(str(decision["dtao_amount"]))
-            logger.info(f"Attempting sell: dtao_amount={dtao_amount}, pool_tao={self.amm_pool.tao_reserves}, pool_dtao={self.amm_pool.dtao_reserves}")
-            
-            # 使用分批交易来控制滑点
-            from ..utils.batch_trader import BatchTrader
-            batch_trader = BatchTrader(max_slippage=Decimal("0.05"))  # 5%最大滑点
-            
-            # 拆分订单
-            batches = batch_trader.split_sell_order(
-                dtao_amount,
-                self.amm_pool.tao_reserves,
-                self.amm_pool.dtao_reserves
-            )
-            
-            total_dtao_spent = Decimal("0")
-            total_tao_received = Decimal("0")
-            successful_batches = 0
+            result["amount"] = float(total_tao_spent)
+            self._record_transaction("buy", "strategy", total_tao_spent, total_dtao_received, current_price)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Buy completed: %s batches, total_spent=%s, total_received=%s",
+                            successful_batches, total_tao_spent, total_dtao_received)
+        
+            # 记录分批交易信息
+            if self.record_batch_info and len(batches) > 1:
+                result["batch_trade_info"] = {
+                    "type": "buy",
+                    "total_amount": float(total_tao_spent),
+                    "batch_count": successful_batches,
+                    "batch_sizes": [float(b) for b in batches[:successful_batches]],
+                    "max_slippage": 0.05  # 设定的最大滑点
+                }
+        else:
+            logger.warning("All buy batches failed for amount=%s", tao_amount)
+        
+    def _exec_sell(self, decision: Dict[str, Any], current_price: Decimal, result: Dict[str, Any]):
+        """执行策略卖出决策，结果写入result"""
+        if not decision.get("dtao_amount", 0) > 0:
+            return
             
-            # 执行每个批次
-            for batch_dtao in batches:
-                swap_result = self.amm_pool.swap_dtao_for_tao(
-                    batch_dtao,
-                    slippage_tolerance=Decimal("0.06")  # 给6%的容差，确保5%的批次能通过
+        dtao_amount = decision["dtao_amount"]
+        if not isinstance(dtao_amount, Decimal):
+            dtao_amount = Decimal(str(dtao_amount))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Attempting sell: dtao_amount=%s, pool_tao=%s, pool_dtao=%s",
+                        dtao_amount, self.amm_pool.tao_reserves, self.amm_pool.dtao_reserves)
+        
+        # 使用分批交易来控制滑点，拆分订单
+        batches = self.batch_trader.split_sell_order(
+            dtao_amount,
+            self.amm_pool.tao_reserves,
+            self.amm_pool.dtao_reserves
+        )
+        
+        # 依次执行每个批次，某个批次失败则停止后续批次
+        total_dtao_spent, total_tao_received, successful_batches, error = \
+            self.amm_pool.swap_dtao_for_tao_batches(batches, self.batch_slippage_tolerance)
+        if error:
+            logger.warning("Batch sell failed: %s, batch_size=%s", error, batches[successful_batches])
+        
+        # 如果至少有一个批次成功
+        if successful_batches > 0:
+            # 更新策略投资组合
+            if self._strategy_update_portfolio:
+                self._strategy_update_portfolio(
+                    dtao_spent=total_dtao_spent,
+                    tao_received=total_tao_received
                 )
-                if swap_result["success"]:
-                    total_dtao_spent += batch_dtao
-                    total_tao_received += swap_result["tao_received"]
-                    successful_batches += 1
-                else:
-                    logger.warning(f"Batch sell failed: {swap_result}, batch_size={batch_dtao}")
-                    break  # 如果某个批次失败，停止后续批次
-            
-            # 如果至少有一个批次成功
-            if successful_batches > 0:
-                # 更新策略投资组合
-                if hasattr(self.strategy, 'update_portfolio'):
-                    self.strategy.update_portfolio(
-                        dtao_spent=total_dtao_spent,
-                        tao_received=total_tao_received
-                    )
-                result["amount"] = float(total_dtao_spent)
-                self._record_transaction("sell", "strategy", total_tao_received, total_dtao_spent, current_price)
-                logger.info(f"Sell completed: {successful_batches} batches, total_spent={total_dtao_spent}, total_received={total_tao_received}")
-                
-                # 记录分批交易信息
-                if len(batches) > 1:
-                    result["batch_trade_info"] = {
-                        "type": "sell",
-                        "total_amount": float(total_dtao_spent),
-                        "batch_count": successful_batches,
-                        "batch_sizes": [float(b) for b in batches[:successful_batches]],
-                        "max_slippage": 0.05  # 设定的最大滑点
-                    }
-            else:
-                logger.warning(f"All sell batches failed for amount={dtao_amount}")
-                
-        return result
+            result["amount"] = float(total_dtao_spent)
+            self._record_transaction("sell", "strategy", total_tao_received, total_dtao_spent, current_price)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Sell completed: %s batches, total_spent=%s, total_received=%s",
+                            successful_batches, total_dtao_spent, total_tao_received)
+        
+            # 记录分批交易信息
+            if self.record_batch_info and len(batches) > 1:
+                result["batch_trade_info"] = {
+                    "type": "sell",
+                    "total_amount": float(total_dtao_spent),
+                    "batch_count": successful_batches,
+                    "batch_sizes": [float(b) for b in batches[:successful_batches]],
+                    "max_slippage": 0.05  # 设定的最大滑点
+                }
+        else:
+            logger.warning("All sell batches failed for amount=%s", dtao_amount)
         
     def _adapt_tempo_strategy(self, current_price: Decimal) -> Dict[str, Any]:
         """适配旧版Tempo策略接口"""
-        from ..strategies.tempo_sell_strategy import TempoSellStrategy
-        
-        if not isinstance(self.strategy, TempoSellStrategy):
+        if not self._is_tempo_sell:
             return {"action": "none"}
             
         # 检查是否应该买入
@@ -822,52 +1042,26 @@ class EnhancedSubnetSimulator:
                 
         return {"action": "hold"}
         
-    def _process_bots_old(self, current_price: Decimal) -> Dict[str, Any]:
-        """处理机器人交易 - 旧版本，暂时保留"""
-        if not self.bot_manager:
-            return {"active": 0, "trades": 0}
-            
-        # 让机器人管理器处理
-        bot_trades = self.bot_manager.process_block(
-            current_block=self.current_block,
-            current_price=current_price,
-            amm_pool=self.amm_pool
-        )
-        
-        # 记录机器人交易 (暂时注释掉，因为_record_transaction方法不存在)
-        # for trade in bot_trades:
-        #     # 从type字段提取action (bot_buy -> buy, bot_sell -> sell)
-        #     action = trade.get("type", "").replace("bot_", "")
-        #     self._record_transaction(
-        #         action,
-        #         f"bot_{trade.get('bot_id', 'unknown')}",
-        #         trade.get("tao_spent", trade.get("tao_received", 0)),
-        #         trade.get("dtao_received", trade.get("dtao_sold", 0)),
-        #         current_price,
-        #         details=json.dumps(trade)
-        #     )
-            
-        # 获取统计
-        stats = self.bot_manager.get_active_stats()
+    def _get_bot_stats(self, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        获取机器人活跃统计，同一区块内只调用一次get_active_stats()
         
-        return {
-            "active": stats["active_count"],
-            "trades": len(bot_trades),
-            "waiting": stats["waiting_count"],
-            "exited": stats["exited_count"]
-        }
+        Args:
+            refresh: 强制重新读取（池子状态在本区块内发生变化后使用）
+        """
+        if refresh or self._bot_stats_block != self.current_block:
+            self._bot_stats_cache = self.bot_manager.get_active_stats() if self.bot_manager else None
+            self._bot_stats_block = self.current_block
+        return self._bot_stats_cache
         
     def _check_squeeze_operations(self, current_price: Decimal) -> Optional[Dict[str, Any]]:
         """检查并执行绞杀操作（增强策略专用）"""
-        if not isinstance(self.strategy, EnhancedArchitectStrategy):
-            return None
-            
         # 检查是否需要执行绞杀
-        if hasattr(self.strategy, 'check_squeeze_opportunity'):
-            squeeze_decision = self.strategy.check_squeeze_opportunity(
+        if self._strategy_check_squeeze:
+            squeeze_decision = self._strategy_check_squeeze(
                 current_price=current_price,
                 current_block=self.current_block,
-                bot_stats=self.bot_manager.get_active_stats() if self.bot_manager else None
+                bot_stats=self._get_bot_stats()
             )
             
             if squeeze_decision and squeeze_decision.get("execute"):
@@ -887,7 +1081,8 @@ class EnhancedSubnetSimulator:
         amount = Decimal(str(decision.get("amount", "100")))
         
         price_before = self.amm_pool.get_spot_price()
-        bots_before = self.bot_manager.get_active_stats()["active_count"] if self.bot_manager else 0
+        bot_stats = self._get_bot_stats()
+        bots_before = bot_stats["active_count"] if bot_stats else 0
         
         # 根据模式执行不同操作
         if mode == "STOP_LOSS":
@@ -900,80 +1095,89 @@ class EnhancedSubnetSimulator:
             
         elif mode == "OSCILLATE":
             # 震荡操作
-            # 先买后卖，制造震荡
-            self.amm_pool.swap_tao_for_dtao(amount / 2)
-            swap_result = self.amm_pool.swap_dtao_for_tao(amount * price_before / 2)
+            # 先买后卖，制造震荡（卖出量按操作前价格计算，不重新读取价格）
+            half_amount = amount / 2
+            self.amm_pool.swap_tao_for_dtao(half_amount)
+            swap_result = self.amm_pool.swap_dtao_for_tao(half_amount * price_before)
             
         else:
             swap_result = {"success": False}
             
         price_after = self.amm_pool.get_spot_price()
-        bots_after = self.bot_manager.get_active_stats()["active_count"] if self.bot_manager else 0
+        bot_stats = self._get_bot_stats(refresh=True)
+        bots_after = bot_stats["active_count"] if bot_stats else 0
+        
+        price_before_f = float(price_before)
+        price_after_f = float(price_after)
         
         return {
             "mode": mode,
             "cost": float(amount),
-            "price_before": float(price_before),
-            "price_after": float(price_after),
-            "price_impact": float((price_after - price_before) / price_before),
+            "price_before": price_before_f,
+            "price_after": price_after_f,
+            "price_impact": (price_after_f - price_before_f) / price_before_f,
             "bots_squeezed": bots_before - bots_after,
             "success": swap_result.get("success", False)
         }
         
     def _record_block_data(self, block_result: Dict[str, Any]):
-        """记录区块数据"""
-        cursor = self.db_conn.cursor()
-        
-        # 获取策略状态
-        strategy_stats = {}
-        if hasattr(self.strategy, 'get_portfolio_stats'):
-            strategy_stats = self.strategy.get_portfolio_stats(self.amm_pool.get_spot_price())
-            
-        cursor.execute("""
-            INSERT INTO block_data (
-                block, epoch, day, spot_price, moving_price, 
-                emission_share, dtao_reserves, tao_reserves,
-                strategy_tao, strategy_dtao, active_bots, 
-                tao_injected, pending_emission, cumulative_tao_emissions,
-                cumulative_dtao_rewards, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        """, (
-            self.current_block,
-            self.current_epoch,
-            self.current_day,
+        """记录区块数据（先写入缓冲，由_flush_records批量写库）"""
+        # 获取策略状态（每portfolio_sample_interval个区块采样一次，其余区块沿用上次结果）
+        strategy_stats = self._portfolio_stats
+        if self._strategy_get_portfolio_stats and self.current_block % self.portfolio_sample_interval == 0:
+            strategy_stats = self._strategy_get_portfolio_stats(self.amm_pool.get_spot_price())
+            self._portfolio_stats = strategy_stats
+        
+        emission = block_result["emission"]
+        row = (
             block_result["price"],
             block_result["moving_price"],
-            block_result["emission"].get("emission_share", block_result["emission"].get("share", 0)),
+            emission.get("emission_share", emission.get("share", 0)),
             block_result["pool"]["dtao"],
             block_result["pool"]["tao"],
-            float(strategy_stats.get("current_tao_balance", 0)),
-            float(strategy_stats.get("current_dtao_balance", 0)),
-            block_result["bots"]["active"],
-            block_result["emission"].get("tao_injected", 0),
-            float(self.amm_pool.pending_emission_pool) if hasattr(self.amm_pool, 'pending_emission_pool') else 0,
-            float(getattr(self.strategy, 'cumulative_tao_emissions', 0)),
-            float(getattr(self.strategy, 'cumulative_dtao_rewards', 0))
-        ))
+            emission.get("tao_injected", 0),
+            float(self.amm_pool.pending_emission_pool) if hasattr(self.amm_pool, 'pending_emission_pool') else 0
+        )
         
-        self.db_conn.commit()
+        block = self.current_block
+        strategy_tao = float(strategy_stats.get("current_tao_balance", 0))
+        strategy_dtao = float(strategy_stats.get("current_dtao_balance", 0))
+        cumulative_tao = float(getattr(self.strategy, 'cumulative_tao_emissions', 0))
+        cumulative_dtao = float(getattr(self.strategy, 'cumulative_dtao_rewards', 0))
+        
+        self.block_extra_np[block] = (
+            strategy_tao, strategy_dtao, block_result["bots"]["active"],
+            cumulative_tao, cumulative_dtao
+        )
         
-        # 添加到历史记录
-        self.history["blocks"].append(self.current_block)
-        self.history["prices"].append(block_result["price"])
-        self.history["moving_prices"].append(block_result["moving_price"])
-        self.history["emissions"].append(block_result["emission"].get("emission_share", 0))
+        # sqlite模式下同时写入block_data表，便于交互式查询
+        if self.storage_mode != "npz":
+            self._block_rows.append((
+                block,
+                self.current_epoch,
+                self.current_day,
+                row[0],
+                row[1],
+                row[2],
+                row[3],
+                row[4],
+                strategy_tao,
+                strategy_dtao,
+                block_result["bots"]["active"],
+                row[5],
+                row[6],
+                cumulative_tao,
+                cumulative_dtao
+            ))
+        
+        # 写入历史记录
+        self.hist_blocks[block] = block
+        self.history_np[block] = row
         
     def _record_transaction(self, type: str, actor: str, tao_amount: Any, 
                            dtao_amount: Any, price: Decimal, details: str = ""):
         """记录交易"""
-        cursor = self.db_conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO transactions (
-                block, type, actor, tao_amount, dtao_amount, 
-                price, details, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        """, (
+        self._transaction_rows.append((
             self.current_block,
             type,
             actor,
@@ -983,21 +1187,12 @@ class EnhancedSubnetSimulator:
             details
         ))
         
-        self.db_conn.commit()
-        
     def _record_squeeze_operation(self, squeeze_result: Dict[str, Any]):
         """记录绞杀操作"""
         if not squeeze_result:
             return
             
-        cursor = self.db_conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO squeeze_operations (
-                block, mode, cost_tao, price_before, price_after,
-                bots_affected, success, details, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        """, (
+        self._squeeze_rows.append((
             self.current_block,
             squeeze_result["mode"],
             squeeze_result["cost"],
@@ -1005,11 +1200,66 @@ class EnhancedSubnetSimulator:
             squeeze_result["price_after"],
             squeeze_result["bots_squeezed"],
             squeeze_result["success"],
-            json.dumps(squeeze_result),
+            json.dumps(squeeze_result) if self.persist_details else None,
         ))
         
+    def _flush_records(self):
+        """
+        将缓冲的区块/交易/绞杀记录在一个事务中批量写入数据库（无缓冲记录时不提交）
+        
+        后台写线程运行时只把缓冲交给写线程，模拟线程不等待磁盘IO。
+        """
+        if not (self._block_rows or self._transaction_rows or self._squeeze_rows):
+            return
+            
+        records = (self._block_rows, self._transaction_rows, self._squeeze_rows)
+        self._block_rows, self._transaction_rows, self._squeeze_rows = [], [], []
+        
+        if self._db_writer is not None:
+            self._db_queue.put(records)
+        else:
+            self._write_records(*records)
+            
+    def _write_records(self, block_rows: List[tuple], transaction_rows: List[tuple],
+                       squeeze_rows: List[tuple]):
+        """把一批缓冲记录写入数据库并提交"""
+        if block_rows:
+            self._db_cursor.executemany(self._INSERT_BLOCK_SQL, block_rows)
+        if transaction_rows:
+            self._db_cursor.executemany(self._INSERT_TRANSACTION_SQL, transaction_rows)
+        if squeeze_rows:
+            self._db_cursor.executemany(self._INSERT_SQUEEZE_SQL, squeeze_rows)
         self.db_conn.commit()
         
+    def _db_writer_loop(self):
+        """后台写线程：依次写入队列中的记录批次，收到None时退出"""
+        while True:
+            records = self._db_queue.get()
+            if records is None:
+                return
+            if self._db_writer_error is not None:
+                continue  # 已经出错，只继续消费队列避免模拟线程阻塞
+            try:
+                self._write_records(*records)
+            except BaseException as e:
+                self._db_writer_error = e
+                
+    def _start_db_writer(self):
+        """启动后台写线程，此后到_stop_db_writer之前模拟线程不直接访问数据库"""
+        self._db_writer_error = None
+        self._db_writer = threading.Thread(target=self._db_writer_loop, name="simulation-db-writer", daemon=True)
+        self._db_writer.start()
+        
+    def _stop_db_writer(self):
+        """等待后台写线程写完队列中的记录并退出，写入出错时在模拟线程重新抛出"""
+        if self._db_writer is None:
+            return
+        self._db_queue.put(None)
+        self._db_writer.join()
+        self._db_writer = None
+        if self._db_writer_error is not None:
+            raise self._db_writer_error
+        
     def _generate_summary(self) -> Dict[str, Any]:
         """生成模拟摘要"""
         # 获取最终状态
@@ -1044,49 +1294,36 @@ class EnhancedSubnetSimulator:
             # 计算机器人聚合统计
             detailed_bot_stats = self.bot_manager.get_detailed_bot_stats()
             
-            total_spent = 0.0
-            total_received = 0.0
-            total_profit_loss = 0.0
-            wins = 0
-            losses = 0
+            bot_arr = np.array(
+                [(float(b['initial_capital']), float(b['current_capital']), float(b['total_profit_loss']),
+                  b['total_trades'], b['state'] == 'EXITED', b['state'] == 'ACTIVE')
+                 for b in detailed_bot_stats],
+                dtype=self._BOT_SUMMARY_DTYPE
+            )
+            initial_capital = bot_arr['initial']
+            profit_loss = bot_arr['pl']
+            has_trades = bot_arr['trades'] > 0
             
-            for bot_stat in detailed_bot_stats:
-                # 获取每个机器人的交易历史统计
-                # 由于机器人可能盈利，不能简单用initial - current
-                initial_capital = float(bot_stat['initial_capital'])
-                current_capital = float(bot_stat['current_capital'])
-                profit_loss = float(bot_stat['total_profit_loss'])
-                
-                # 如果机器人有交易历史
-                if bot_stat['total_trades'] > 0:
-                    # 对于退出的机器人，实际花费应该从盈亏反推
-                    if bot_stat['state'] == 'EXITED':
-                        # 如果亏损：花费 = 亏损额
-                        # 如果盈利：花费 = 盈利 / 盈利率（需要更复杂计算）
-                        # 简化方案：使用平均买入金额估算
-                        if profit_loss < 0:
-                            # 亏损的绝对值就是花费
-                            total_spent += abs(profit_loss)
-                        else:
-                            # 盈利情况，估算原始投入（基于机器人类型的典型投入）
-                            # 使用0.01-0.2 TAO的范围估算
-                            estimated_spent = min(initial_capital * 0.1, 0.2)  # 10%资金或0.2 TAO
-                            total_spent += estimated_spent
-                            total_received += estimated_spent + profit_loss
-                    
-                    elif bot_stat['state'] == 'ACTIVE':
-                        # 活跃机器人：花费 = 初始资金 - 当前资金
-                        spent = initial_capital - current_capital
-                        if spent > 0:
-                            total_spent += spent
-                
-                # 统计盈亏
-                total_profit_loss += profit_loss
-                
-                if profit_loss > 0:
-                    wins += 1
-                elif profit_loss < 0:
-                    losses += 1
+            # 由于机器人可能盈利，不能简单用initial - current
+            # 退出的机器人：亏损时花费 = 亏损额；盈利时用10%资金或0.2 TAO估算原始投入
+            exited = has_trades & bot_arr['exited']
+            exited_loss = exited & (profit_loss < 0)
+            exited_gain = exited & ~(profit_loss < 0)
+            estimated_spent = np.minimum(initial_capital * 0.1, 0.2)
+            
+            # 活跃机器人：花费 = 初始资金 - 当前资金
+            active_spent = initial_capital - bot_arr['current']
+            active_spent = np.where(has_trades & bot_arr['active'] & (active_spent > 0), active_spent, 0.0)
+            
+            total_spent = float(
+                (-profit_loss[exited_loss]).sum() + estimated_spent[exited_gain].sum() + active_spent.sum()
+            )
+            total_received = float((estimated_spent[exited_gain] + profit_loss[exited_gain]).sum())
+            
+            # 统计盈亏
+            total_profit_loss = float(profit_loss.sum())
+            wins = int((profit_loss > 0).sum())
+            losses = int((profit_loss < 0).sum())
             
             bot_stats.update({
                 "total_spent": total_spent,
@@ -1115,6 +1352,19 @@ class EnhancedSubnetSimulator:
         # 绞杀统计
         squeeze_stats = self._get_squeeze_statistics()
         
+        # 价格与emission统计（对历史矩阵的列做向量化计算）
+        prices = self.history_np[:, self._HFIELDS["price"]]
+        if len(prices):
+            running_peak = np.maximum.accumulate(prices)
+            max_drawdown = float(((running_peak - prices) / running_peak).max())
+            price_max = float(running_peak[-1])  # 累计最大值的最后一项即全程最高价
+            price_min = float(prices.min())
+            price_mean = float(prices.mean())
+            avg_share = float(self.history_np[:, self._HFIELDS["eshare"]].mean())
+            total_tao_injected = float(self.history_np[:, self._HFIELDS["tao_inj"]].sum())
+        else:
+            max_drawdown = price_max = price_min = price_mean = avg_share = total_tao_injected = 0.0
+        
         summary = {
             "success": True,  # 添加success字段
             "simulation_config": {
@@ -1127,15 +1377,18 @@ class EnhancedSubnetSimulator:
                 "initial": float(initial_price),
                 "final": float(final_price),
                 "change_percent": float((final_price - initial_price) / initial_price * 100),
-                "max": float(max(self.history["prices"])),
-                "min": float(min(self.history["prices"]))
+                "max": price_max,
+                "min": price_min,
+                "mean": price_mean,
+                "max_drawdown_percent": max_drawdown * 100
             },
             "strategy_performance": strategy_stats,
             "bot_simulation": bot_stats,
             "squeeze_analysis": squeeze_stats,
             "emission_summary": {
                 "total_blocks": self.total_blocks - self.immunity_blocks,
-                "avg_share": sum(self.history["emissions"]) / len(self.history["emissions"]) if self.history["emissions"] else 0,
+                "avg_share": avg_share,
+                "total_tao_injected": total_tao_injected,
                 "cumulative_tao_emissions": float(self.cumulative_tao_emissions),
                 "tao_emissions_to_strategy": float(self.cumulative_tao_emissions)
             }
@@ -1147,36 +1400,35 @@ class EnhancedSubnetSimulator:
         """获取绞杀统计"""
         cursor = self.db_conn.cursor()
         
-        # 查询绞杀操作统计
+        # 所有成功操作的汇总
+        cursor.execute("""
+            SELECT COUNT(*), SUM(cost_tao), SUM(bots_affected)
+            FROM squeeze_operations
+            WHERE success = 1
+        """)
+        total_ops, total_cost, total_bots = cursor.fetchone()
+        total_cost = total_cost or 0
+        total_bots = total_bots or 0
+        
+        # 按模式分组的统计
         cursor.execute("""
             SELECT 
-                COUNT(*) as total_operations,
-                SUM(cost_tao) as total_cost,
-                SUM(bots_affected) as total_bots_squeezed,
-                AVG(ABS(price_after - price_before) / price_before) as avg_price_impact,
                 mode,
-                COUNT(*) as mode_count
+                COUNT(*) as mode_count,
+                SUM(cost_tao) as total_cost,
+                AVG(ABS(price_after - price_before) / price_before) as avg_price_impact
             FROM squeeze_operations
             WHERE success = 1
             GROUP BY mode
         """)
         
         mode_stats = {}
-        total_ops = 0
-        total_cost = 0
-        total_bots = 0
-        
-        for row in cursor.fetchall():
-            if row[0] > 0:  # 有成功的操作
-                mode = row[4]
-                mode_stats[mode] = {
-                    "count": row[5],
-                    "total_cost": row[1] or 0,
-                    "avg_price_impact": row[3] or 0
-                }
-                total_ops = row[0]
-                total_cost = row[1] or 0
-                total_bots = row[2] or 0
+        for mode, count, mode_cost, avg_price_impact in cursor.fetchall():
+            mode_stats[mode] = {
+                "count": count,
+                "total_cost": mode_cost or 0,
+                "avg_price_impact": avg_price_impact or 0
+            }
                 
         return {
             "total_operations": total_ops,
@@ -1188,51 +1440,85 @@ class EnhancedSubnetSimulator:
         
     def _save_results(self, summary: Dict[str, Any]):
         """保存结果到文件"""
-        # 保存摘要
+        # 关闭数据库前确保缓冲记录已写入
+        self._flush_records()
+        
         summary_path = os.path.join(self.output_dir, "simulation_summary.json")
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, default=str)
-            
-        # 保存价格历史
         history_path = os.path.join(self.output_dir, "price_history.json")
-        with open(history_path, 'w', encoding='utf-8') as f:
-            json.dump({
-                "blocks": self.history["blocks"],
-                "spot_prices": self.history["prices"],  # 改为spot_prices以匹配前端
-                "moving_prices": self.history["moving_prices"]
-            }, f, indent=2)
+        price_history = {
+            "blocks": self.hist_blocks.tolist(),
+            "spot_prices": self.history_np[:, self._HFIELDS["price"]].tolist(),  # 改为spot_prices以匹配前端
+            "moving_prices": self.history_np[:, self._HFIELDS["mprice"]].tolist()
+        }
+        
+        # 两个JSON文件在后台线程写出，与区块数据导出重叠进行
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            json_writes = [
+                executor.submit(_write_json, summary_path, summary, default=str),  # 保存摘要
+                executor.submit(_write_json, history_path, price_history)          # 保存价格历史
+            ]
             
-        # 导出block_data到CSV
+            # 区块数据导出需要使用数据库连接，留在当前线程执行
+            if self.storage_mode == "npz":
+                # npz模式：整块导出数组，不经过block_data表
+                self._save_block_data_npz()
+            else:
+                self._export_block_data_csv()
+                
+            for future in json_writes:
+                future.result()
+                
+        # 关闭数据库（先关闭长期持有的游标，连接才能完整释放WAL文件）
+        self._db_cursor.close()
+        self.db_conn.close()
+        
+        logger.info(f"结果已保存到: {self.output_dir}")
+        
+    def _export_block_data_csv(self):
+        """导出block_data到CSV（直接从内存中的历史数组按块写出，不回读数据库）"""
         try:
-            cursor = self.db_conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    block, epoch, day, spot_price, moving_price,
-                    emission_share, dtao_reserves, tao_reserves,
-                    strategy_tao, strategy_dtao, active_bots,
-                    tao_injected, pending_emission,
-                    cumulative_tao_emissions, cumulative_dtao_rewards,
-                    strategy_tao as strategy_tao_balance,
-                    strategy_dtao as strategy_dtao_balance
-                FROM block_data
-                ORDER BY block
-            """)
-            
-            import pandas as pd
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
-            
-            if rows:
-                df_blocks = pd.DataFrame(rows, columns=columns)
+            if not len(self.hist_blocks):
+                return
                 
-                # 保存CSV
-                blocks_path = os.path.join(self.output_dir, "block_data.csv")
-                df_blocks.to_csv(blocks_path, index=False)
-                logger.info(f"已导出 {len(df_blocks)} 条区块数据到 block_data.csv")
+            columns = self._block_data_columns()
+            # 兼容旧格式的两个别名列
+            columns["strategy_tao_balance"] = columns["strategy_tao"]
+            columns["strategy_dtao_balance"] = columns["strategy_dtao"]
+            
+            blocks_path = os.path.join(self.output_dir, "block_data.csv")
+            chunk = self._CSV_CHUNK_ROWS
+            with open(blocks_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(columns.keys())
+                for start in range(0, len(self.hist_blocks), chunk):
+                    writer.writerows(zip(*(col[start:start + chunk].tolist() for col in columns.values())))
+            logger.info(f"已导出 {len(self.hist_blocks)} 条区块数据到 block_data.csv")
         except Exception as e:
             logger.error(f"导出block_data.csv失败: {e}")
-            
-        # 关闭数据库
-        self.db_conn.close()
         
-        logger.info(f"结果已保存到: {self.output_dir}")
\ No newline at end of file
+    def _block_data_columns(self) -> Dict[str, np.ndarray]:
+        """按block_data表的列顺序返回区块数据列"""
+        extra = {name: self.block_extra_np[:, i] for i, name in enumerate(self._EXTRA_FIELDS)}
+        return {
+            "block": self.hist_blocks,
+            "epoch": self.hist_blocks // self.tempo_blocks,
+            "day": self.hist_blocks // self.blocks_per_day,
+            "spot_price": self.history_np[:, self._HFIELDS["price"]],
+            "moving_price": self.history_np[:, self._HFIELDS["mprice"]],
+            "emission_share": self.history_np[:, self._HFIELDS["eshare"]],
+            "dtao_reserves": self.history_np[:, self._HFIELDS["dtao"]],
+            "tao_reserves": self.history_np[:, self._HFIELDS["tao"]],
+            "strategy_tao": extra["strategy_tao"],
+            "strategy_dtao": extra["strategy_dtao"],
+            "active_bots": extra["active_bots"].astype(np.int32),
+            "tao_injected": self.history_np[:, self._HFIELDS["tao_inj"]],
+            "pending_emission": self.history_np[:, self._HFIELDS["pending"]],
+            "cumulative_tao_emissions": extra["cumulative_tao_emissions"],
+            "cumulative_dtao_rewards": extra["cumulative_dtao_rewards"]
+        }
+        
+    def _save_block_data_npz(self):
+        """把区块数据按列导出到block_data.npz（列名与block_data表一致）"""
+        npz_path = os.path.join(self.output_dir, "block_data.npz")
+        np.savez_compressed(npz_path, **self._block_data_columns())
+        logger.info(f"已导出 {len(self.hist_blocks)} 条区块数据到 block_data.npz")
@@ -3,13 +3,16 @@ Bittensor子网收益模拟器 - 主模拟引擎
 整合AMM池、Emission计算和策略执行
 """
 
+import csv
 import sqlite3
 import os
 import json
 from decimal import Decimal, getcontext
 from typing import Dict, Any, List, Optional
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
 from ..core.amm_pool import AMMPool
@@ -21,6 +24,53 @@ getcontext().prec = 50
 
 logger = logging.getLogger(__name__)
 
+# 每区块使用的Decimal常量（避免在区块循环中重复构造）
+_ZERO = Decimal("0")
+_ONE = Decimal("1")
+_DTAO_TO_POOL = Decimal("1.0")  # 每区块注入池子的dTAO数量固定为1
+
+
+def _to_jsonable(obj: Any) -> Any:
+    """
+    把摘要中的Decimal等值预先转换为JSON原生类型
+    
+    非JSON原生的值统一转为str，输出与json.dump(..., default=str)一致，
+    但不再依赖序列化时逐个值抛出TypeError再回退。
+    """
+    if isinstance(obj, dict):
+        return {key: _to_jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_jsonable(value) for value in obj]
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return str(obj)
+
+
+def _block_step(block_number: int, blocks_per_day: int, tempo_blocks: int,
+                ramp_up_epochs: int, immunity_end: int) -> tuple:
+    """
+    每区块的标量计算（纯int/float，不涉及Decimal）
+    
+    Returns:
+        (day, epoch, ramp_up_factor, immunity_passed)
+    """
+    epoch = block_number // tempo_blocks
+    ramp_up_factor = epoch / ramp_up_epochs
+    if ramp_up_factor > 1.0:
+        ramp_up_factor = 1.0
+    return block_number // blocks_per_day, epoch, ramp_up_factor, block_number >= immunity_end
+
+
+def _block_timestamps(sim_epoch: datetime, total_blocks: int) -> np.ndarray:
+    """
+    向量化生成区块0..total_blocks-1的模拟时间戳（每区块12秒）
+    
+    Returns:
+        "U19"字符串数组，格式与datetime.isoformat()一致（整秒，无微秒部分）
+    """
+    offsets = np.arange(total_blocks, dtype=np.int64) * np.timedelta64(12, "s")
+    return (np.datetime64(sim_epoch, "s") + offsets).astype("U19")
+
 
 class BittensorSubnetSimulator:
     """
@@ -33,6 +83,33 @@ class BittensorSubnetSimulator:
     4. 记录和分析数据
     """
     
+    # 区块数据的结构化数组类型（字段顺序与block_data表一致）
+    _BLOCK_DTYPE = np.dtype([
+        ("block_number", np.int64), ("day", np.int64), ("tempo", np.int64),
+        ("dtao_reserves", np.float64), ("tao_reserves", np.float64),
+        ("spot_price", np.float64), ("moving_price", np.float64),
+        ("tao_injected", np.float64), ("dtao_to_pool", np.float64), ("dtao_to_pending", np.float64),
+        ("emission_share", np.float64),
+        ("strategy_tao_balance", np.float64), ("strategy_dtao_balance", np.float64),
+        ("total_volume", np.float64), ("pending_emission", np.float64), ("owner_cut_pending", np.float64),
+        ("dtao_rewards_received", np.float64),
+        ("timestamp", "U19")
+    ])
+    
+    # 导出block_data.csv时每次转换/写出的行数
+    _CSV_CHUNK_ROWS = 10000
+    
+    # 缓冲的区块/交易记录每隔多少区块批量写入一次数据库
+    _FLUSH_INTERVAL_BLOCKS = 5000
+    
+    _INSERT_BLOCK_SQL = """
+        INSERT INTO block_data VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    _INSERT_TRANSACTION_SQL = """
+        INSERT INTO transactions (block_number, transaction_type, tao_amount, dtao_amount, price, slippage, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    
     def __init__(self, config_path: str, output_dir: str = "results"):
         """
         初始化模拟器
@@ -68,8 +145,29 @@ class BittensorSubnetSimulator:
         # 其他子网的平均价格（假设恒定）
         self.other_subnets_avg_price = Decimal(str(self.config["market"]["other_subnets_avg_price"]))
         
-        # 数据记录
-        self.block_data = []
+        # 🔧 修正：从主模拟器的config中获取UI参数（奖励分成和外部卖压），只在初始化时解析一次
+        self._user_share = Decimal(self.config['strategy'].get('user_reward_share', '100')) / Decimal('100')
+        self._external_share = _ONE - self._user_share
+        self._external_sell_pressure = Decimal(self.config['strategy'].get('external_sell_pressure', '0')) / Decimal('100')
+        
+        # 记录中的时间戳使用模拟时间：起始时间 + 区块号 × 12秒（结果可复现）
+        self._sim_epoch = datetime(2024, 1, 1)
+        # 模拟范围内各区块的时间戳一次性向量化生成，process_block按区块号查表
+        self._block_timestamps = _block_timestamps(self._sim_epoch, self.total_blocks)
+        
+        # 上一次计算的排放份额/TAO注入量及其输入（见process_block）
+        self._emission_share_key = None
+        self._emission_share = (Decimal("0"), Decimal("0"), 0.0, 0.0)
+        
+        # 待分配dTAO的增长因子按Epoch缓存（每个Epoch只构造一次Decimal）
+        self._ramp_up_epoch = -1
+        self._dtao_to_pending = Decimal("0")
+        
+        # 数据记录：区块数据写入预分配的结构化数组，_block_count为已写入行数，
+        # _block_flushed为其中已写入数据库的行数
+        self._block_arr = np.zeros(self.total_blocks, dtype=self._BLOCK_DTYPE)
+        self._block_count = 0
+        self._block_flushed = 0
         self.daily_summary = []
         
         logger.info(f"模拟器初始化完成: {self.simulation_days}天, 总计{self.total_blocks}区块")
@@ -109,7 +207,23 @@ class BittensorSubnetSimulator:
     def _init_database(self):
         """初始化数据库"""
         self.db_path = os.path.join(self.output_dir, "simulation_data.db")
-        self.conn = sqlite3.connect(self.db_path)
+        # 自动提交模式：批量写入时显式BEGIN/COMMIT，避免sqlite3模块隐式开启事务
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+        
+        # page_size只对新建的数据库生效，必须在切换WAL和建表之前设置
+        self.conn.execute("PRAGMA page_size=16384")
+        
+        # 模拟数据可重新生成，放宽同步要求以减少磁盘IO
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        
+        # 较大的页缓存和内存映射，减少批量写入时的页读写
+        self.conn.execute("PRAGMA cache_size=-65536")
+        self.conn.execute("PRAGMA mmap_size=1073741824")
+        
+        # 待写入的交易记录缓冲（区块数据直接从区块数组中未写库的部分读取），由_flush_buffers批量写入
+        self._tx_buffer: List[tuple] = []
         
         # 清理已存在的数据（避免主键冲突）
         self.conn.executescript("""
@@ -203,134 +317,164 @@ class BittensorSubnetSimulator:
             subnet_activation_block=self.subnet_activation_block
         )
     
-    def process_block(self, block_number: int) -> Dict[str, Any]:
+    def process_block(self, block_number: int, full_result: bool = True) -> Optional[Dict[str, Any]]:
         """
         处理单个区块
         
         Args:
             block_number: 区块号
+            full_result: 是否构建并返回完整的区块处理结果（含池子和资产组合统计）
             
         Returns:
-            区块处理结果
+            区块处理结果；full_result为False时返回None
         """
+        amm_pool = self.amm_pool
+        emission_calculator = self.emission_calculator
+        # 调试日志默认关闭，关闭时不格式化每区块的日志参数
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        
         self.current_block = block_number
-        self.current_day = block_number // self.blocks_per_day
-        current_epoch = block_number // self.tempo_blocks
+        ramp_up_epochs = 100
+        immunity_end = self.subnet_activation_block + emission_calculator.immunity_blocks
+        self.current_day, current_epoch, ramp_up_factor, immunity_passed = _block_step(
+            block_number, self.blocks_per_day, self.tempo_blocks, ramp_up_epochs, immunity_end
+        )
         
         # 1. dTAO奖励的线性增长机制
         # 在前100个Epoch，奖励从0线性增长到1
-        ramp_up_epochs = 100
-        ramp_up_factor = min(Decimal(str(current_epoch)) / Decimal(str(ramp_up_epochs)), Decimal("1.0"))
+        if current_epoch != self._ramp_up_epoch:
+            self._ramp_up_epoch = current_epoch
+            self._dtao_to_pending = Decimal(repr(ramp_up_factor))
         
         # 核心修正：实现正确的dTAO产生机制
         # 每个区块（12秒）产生2个dTAO：1个进入池子，1个进入待分配
-        dtao_to_pool = Decimal("1.0")    # 注入池子的dTAO数量固定为1
-        dtao_to_pending = Decimal("1.0") * ramp_up_factor # 待分配奖励随Epoch增长
+        dtao_to_pool = _DTAO_TO_POOL    # 注入池子的dTAO数量固定为1
+        dtao_to_pending = self._dtao_to_pending  # 待分配奖励随Epoch增长
         
         # 2. 将1个dTAO直接注入到AMM池（增加流动性）
         if dtao_to_pool > 0:
-            pool_injection_result = self.amm_pool.inject_dtao_direct(dtao_to_pool)
-            logger.debug(f"区块{block_number}: 向AMM池注入{dtao_to_pool} dTAO，增加流动性")
+            amm_pool.inject_dtao_direct(dtao_to_pool, return_details=False)
+            if debug_enabled:
+                logger.debug("区块%d: 向AMM池注入%s dTAO，增加流动性", block_number, dtao_to_pool)
         
         # 重要：使用当前moving price计算排放份额（在更新moving price之前）
         # 这匹配源代码逻辑：先用moving price计算emission，再更新moving price
-        current_moving_price = self.amm_pool.moving_price
-        total_moving_prices = self.other_subnets_avg_price + current_moving_price
-        
-        emission_share = self.emission_calculator.calculate_subnet_emission_share(
-            subnet_moving_price=current_moving_price,
-            total_moving_prices=total_moving_prices,
-            current_block=block_number,
-            subnet_activation_block=self.subnet_activation_block
-        )
-        
-        # 🔧 修正：使用EmissionCalculator的TAO注入计算，应用可配置的tao_per_block参数
-        tao_injection_this_block = self.emission_calculator.calculate_block_tao_injection(
-            emission_share=emission_share,
-            current_block=block_number,
-            subnet_activation_block=self.subnet_activation_block
-        )
+        # 份额只取决于moving price、其他子网价格和是否过了豁免期（豁免期内恒为0），输入不变时复用上次结果
+        # 本区块TAO注入量 = tao_per_block × 排放份额（豁免期内为0），与份额一起缓存，
+        # 同时缓存两者的float值供区块记录使用
+        current_moving_price = amm_pool.moving_price
+        share_key = (current_moving_price if immunity_passed else None, immunity_passed, self.other_subnets_avg_price)
+        if share_key != self._emission_share_key:
+            total_moving_prices = self.other_subnets_avg_price + current_moving_price
+            emission_share = emission_calculator.calculate_subnet_emission_share(
+                subnet_moving_price=current_moving_price,
+                total_moving_prices=total_moving_prices,
+                current_block=block_number,
+                subnet_activation_block=self.subnet_activation_block
+            )
+            if immunity_passed:
+                tao_injection = emission_calculator.tao_per_block * emission_share
+            else:
+                tao_injection = _ZERO
+            self._emission_share = (emission_share, tao_injection, float(emission_share), float(tao_injection))
+            self._emission_share_key = share_key
+        emission_share, tao_injection_this_block, emission_share_f, tao_injection_f = self._emission_share
         
         # 3. 处理pending emission的dTAO分配
         # 使用固定的dTAO进入待分配，而不是复杂的alpha计算
-        comprehensive_result = self.emission_calculator.calculate_comprehensive_emission(
-            netuid=1,  # 假设子网ID为1
-            emission_share=emission_share,
-            current_block=block_number,
-            alpha_emission_base=dtao_to_pending  # 🔧 使用实际的dTAO待分配量
-        )
+        # 只有epoch区块（会排放）或需要返回完整结果时才走完整计算，其余区块只累积
+        if full_result or emission_calculator.should_drain_pending_emission(1, block_number):
+            comprehensive_result = emission_calculator.calculate_comprehensive_emission(
+                netuid=1,  # 假设子网ID为1
+                emission_share=emission_share,
+                current_block=block_number,
+                alpha_emission_base=dtao_to_pending  # 🔧 使用实际的dTAO待分配量
+            )
+            drain_result = comprehensive_result["drain_result"]
+            pending_stats = comprehensive_result["pending_stats"]
+        else:
+            emission_calculator.accumulate_block_emission(1, dtao_to_pending)
+            comprehensive_result = None
+            drain_result = None
+            pending_stats = emission_calculator.get_pending_stats(1)
         
         # 4. TAO注入（基于市场价格平衡机制，独立于dTAO产生）
         if tao_injection_this_block > 0:
-            injection_result = self.amm_pool.inject_tao(tao_injection_this_block)
-            logger.debug(f"区块{block_number}: 市场平衡注入{tao_injection_this_block} TAO")
+            amm_pool.inject_tao(tao_injection_this_block, return_details=False)
+            if debug_enabled:
+                logger.debug("区块%d: 市场平衡注入%s TAO", block_number, tao_injection_this_block)
         
         # 重要修正：只在豁免期结束后才更新移动平均价格
-        if block_number >= self.subnet_activation_block + self.emission_calculator.immunity_blocks:
-            self.amm_pool.update_moving_price(block_number)
+        if immunity_passed:
+            amm_pool.update_moving_price(block_number)
         
         # 5. 处理PendingEmission排放（如果到时间）
-        drain_result = comprehensive_result["drain_result"]
-        total_rewards_this_block = Decimal("0")
+        total_rewards_this_block = _ZERO
         if drain_result and drain_result["drained"]:
             # 从排放的pending emission中获得dTAO奖励
             total_rewards_this_block = drain_result["pending_alpha_drained"]
-            logger.info(f"区块{block_number}: PendingEmission排放 {total_rewards_this_block} dTAO")
+            logger.info("区块%d: PendingEmission排放 %s dTAO", block_number, total_rewards_this_block)
         
         # 6. 执行策略
-        # 🔧 修正：从主模拟器的config中获取UI参数
-        user_share_decimal = Decimal(self.config['strategy'].get('user_reward_share', '100')) / Decimal('100')
-        external_sell_pressure_decimal = Decimal(self.config['strategy'].get('external_sell_pressure', '0')) / Decimal('100')
-        
-        dtao_rewards_for_user = total_rewards_this_block * user_share_decimal
-        external_rewards = total_rewards_this_block * (Decimal('1') - user_share_decimal)
+        dtao_rewards_for_user = total_rewards_this_block * self._user_share
+        external_rewards = total_rewards_this_block * self._external_share
 
-        if external_rewards > 0 and external_sell_pressure_decimal > 0:
-            amount_to_sell = external_rewards * external_sell_pressure_decimal
-            self.amm_pool.swap_dtao_for_tao(amount_to_sell)
-            logger.debug(f"区块{block_number}: 外部卖出 {amount_to_sell} dTAO")
+        if external_rewards > 0 and self._external_sell_pressure > 0:
+            amount_to_sell = external_rewards * self._external_sell_pressure
+            amm_pool.swap_dtao_for_tao(amount_to_sell)
+            if debug_enabled:
+                logger.debug("区块%d: 外部卖出 %s dTAO", block_number, amount_to_sell)
 
-        current_price = self.amm_pool.get_spot_price()
+        current_price = amm_pool.get_spot_price()
         transactions = self.strategy.process_block(
             current_block=block_number,
             current_price=current_price,
-            amm_pool=self.amm_pool,
+            amm_pool=amm_pool,
             dtao_rewards=dtao_rewards_for_user, # 只把用户应得的奖励传给策略
             tao_injected=tao_injection_this_block
         )
         
-        # 记录交易到数据库
+        # 记录交易到数据库（本区块的记录共用同一个模拟时间戳）
+        if 0 <= block_number < len(self._block_timestamps):
+            timestamp = str(self._block_timestamps[block_number])
+        else:
+            timestamp = (self._sim_epoch + timedelta(seconds=block_number * 12)).isoformat()
         for tx in transactions:
-            self._record_transaction(block_number, tx)
+            self._record_transaction(block_number, tx, timestamp)
         
-        # 收集区块数据
-        pool_stats = self.amm_pool.get_pool_stats()
-        portfolio_stats = self.strategy.get_portfolio_stats(current_market_price=current_price)
+        # 收集区块数据（只取记录需要的标量，完整的统计字典只在需要返回结果时构建）
+        dtao_reserves_f, tao_reserves_f, spot_price_f, moving_price_f, total_volume_f = amm_pool.get_hot_stats()
+        tao_balance_f, dtao_balance_f = self.strategy.get_hot_stats()
         
-        block_data = {
-            "block_number": block_number,
-            "day": self.current_day,
-            "tempo": current_epoch,
-            "dtao_reserves": float(pool_stats["dtao_reserves"]),
-            "tao_reserves": float(pool_stats["tao_reserves"]),
-            "spot_price": float(pool_stats["spot_price"]),
-            "moving_price": float(pool_stats["moving_price"]),
-            "tao_injected": float(tao_injection_this_block),
-            "dtao_to_pool": float(dtao_to_pool),      # 🔧 新增：记录注入到池子的dTAO
-            "dtao_to_pending": float(dtao_to_pending), # 🔧 新增：记录进入待分配的dTAO
-            "emission_share": float(emission_share),
-            "strategy_tao_balance": float(portfolio_stats["current_tao_balance"]),
-            "strategy_dtao_balance": float(portfolio_stats["current_dtao_balance"]),
-            "total_volume": float(pool_stats["total_volume"]),
-            "pending_emission": float(comprehensive_result["pending_stats"]["pending_emission"]),
-            "owner_cut_pending": float(comprehensive_result["pending_stats"]["pending_owner_cut"]),
-            "dtao_rewards_received": float(dtao_rewards_for_user),
-            "timestamp": datetime.now().isoformat()
-        }
+        block_row = (
+            block_number,
+            self.current_day,
+            current_epoch,
+            dtao_reserves_f,
+            tao_reserves_f,
+            spot_price_f,
+            moving_price_f,
+            tao_injection_f,
+            float(dtao_to_pool),      # 🔧 新增：记录注入到池子的dTAO
+            ramp_up_factor,           # 🔧 新增：记录进入待分配的dTAO（数值等于增长因子）
+            emission_share_f,
+            tao_balance_f,
+            dtao_balance_f,
+            total_volume_f,
+            float(pending_stats["pending_emission"]),
+            float(pending_stats["pending_owner_cut"]),
+            float(dtao_rewards_for_user),
+            timestamp
+        )
+        
+        # 保存到区块数组和数据库缓冲
+        self._record_block_data(block_row)
+        
+        if not full_result:
+            return None
         
-        # 保存到数据库
-        self._record_block_data(block_data)
-        self.block_data.append(block_data)
+        pool_stats = amm_pool.get_pool_stats()
+        portfolio_stats = self.strategy.get_portfolio_stats(current_market_price=current_price)
         
         return {
             "block_number": block_number,
@@ -347,37 +491,60 @@ class BittensorSubnetSimulator:
             "dtao_rewards": dtao_rewards_for_user
         }
     
-    def _record_block_data(self, data: Dict[str, Any]):
-        """记录区块数据到数据库"""
-        self.conn.execute("""
-            INSERT INTO block_data VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            data["block_number"], data["day"], data["tempo"],
-            data["dtao_reserves"], data["tao_reserves"], data["spot_price"], data["moving_price"],
-            data["tao_injected"], data["dtao_to_pool"], data["dtao_to_pending"],
-            data["emission_share"], data["strategy_tao_balance"], data["strategy_dtao_balance"],
-            data["total_volume"], data["pending_emission"], data["owner_cut_pending"],
-            data["dtao_rewards_received"], data["timestamp"]
-        ))
+    @property
+    def block_data(self) -> np.ndarray:
+        """
+        已模拟区块的数据（结构化数组视图，字段同block_data表）
         
-        if data["block_number"] % 1000 == 0:  # 每1000区块提交一次
-            self.conn.commit()
+        可直接传给pd.DataFrame，逐行迭代时每行支持row["字段名"]访问。
+        """
+        return self._block_arr[:self._block_count]
     
-    def _record_transaction(self, block_number: int, transaction: Dict[str, Any]):
-        """记录交易到数据库"""
-        self.conn.execute("""
-            INSERT INTO transactions (block_number, transaction_type, tao_amount, dtao_amount, price, slippage, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
+    def _record_block_data(self, row: tuple):
+        """记录区块数据（写入区块数组，由_flush_buffers按批写库）"""
+        if self._block_count == len(self._block_arr):
+            # 超出预分配长度（如在run_simulation之外继续处理区块）时扩容
+            self._block_arr = np.concatenate(
+                [self._block_arr, np.zeros(max(len(self._block_arr), 1), dtype=self._BLOCK_DTYPE)]
+            )
+        self._block_arr[self._block_count] = row
+        self._block_count += 1
+        
+        if row[0] % self._FLUSH_INTERVAL_BLOCKS == 0:
+            self._flush_buffers()
+    
+    def _record_transaction(self, block_number: int, transaction: Dict[str, Any], timestamp: str):
+        """记录交易（先写入缓冲，由_flush_buffers批量写库）"""
+        self._tx_buffer.append((
             block_number,
             transaction["type"],
             float(transaction.get("tao_spent", transaction.get("tao_received", 0))),
             float(transaction.get("dtao_received", transaction.get("dtao_sold", 0))),
             float(transaction["price"]),
             float(transaction.get("slippage", 0.0)),
-            datetime.now().isoformat()
+            timestamp
         ))
     
+    def _flush_buffers(self):
+        """将区块数组中未写库的行和缓冲的交易记录在一个事务中批量写入数据库（无待写记录时直接返回）"""
+        start, end = self._block_flushed, self._block_count
+        if start == end and not self._tx_buffer:
+            return
+        
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if end > start:
+                # 连续的数组切片一次性转为Python元组列表后批量插入
+                self.conn.executemany(self._INSERT_BLOCK_SQL, self._block_arr[start:end].tolist())
+            if self._tx_buffer:
+                self.conn.executemany(self._INSERT_TRANSACTION_SQL, self._tx_buffer)
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self._block_flushed = end
+        self._tx_buffer = []
+    
     def run_simulation(self, progress_callback=None) -> Dict[str, Any]:
         """
         运行完整模拟
@@ -391,23 +558,30 @@ class BittensorSubnetSimulator:
         logger.info(f"开始模拟: {self.simulation_days}天, {self.total_blocks}区块")
         start_time = datetime.now()
         
+        process_block = self.process_block
+        blocks_per_day = self.blocks_per_day
+        
         try:
             for block in range(self.total_blocks):
-                # 处理区块
-                result = self.process_block(block)
+                # 处理区块（只有需要进度回调的区块才构建完整结果）
+                need_result = progress_callback is not None and block % 100 == 0
+                result = process_block(block, full_result=need_result)
                 
                 # 进度回调
-                if progress_callback and block % 100 == 0:
+                if need_result:
                     progress = (block + 1) / self.total_blocks * 100
                     progress_callback(progress, block, result)
                 
                 # 日志记录
-                if block % self.blocks_per_day == 0 and block > 0:
-                    day = block // self.blocks_per_day
+                if block % blocks_per_day == 0 and block > 0:
+                    day = block // blocks_per_day
                     logger.info(f"完成第{day}天模拟 (区块{block})")
             
-            # 提交最终数据
-            self.conn.commit()
+            # 写入剩余的缓冲记录
+            self._flush_buffers()
+            
+            # 按天汇总区块数据
+            self._write_daily_summary()
             
             # 生成摘要
             end_time = datetime.now()
@@ -423,6 +597,56 @@ class BittensorSubnetSimulator:
             raise
         finally:
             self.conn.close()
+            # 标记为已关闭，export_data_to_csv会重新连接
+            self.conn = None
+    
+    def _block_frame(self) -> pd.DataFrame:
+        """把区块数组按列构造成DataFrame（每列一次连续拷贝，无逐行推断）"""
+        block_data = self.block_data
+        return pd.DataFrame({name: block_data[name] for name in self._BLOCK_DTYPE.names})
+    
+    def _write_daily_summary(self):
+        """按天聚合区块数据（一次groupby完成），写入daily_summary表和self.daily_summary"""
+        if not self._block_count:
+            return
+        
+        daily = self._block_frame().groupby("day").agg(
+            blocks_simulated=("block_number", "count"),
+            avg_price=("spot_price", "mean"),
+            total_tao_injected=("tao_injected", "sum"),
+            total_alpha_injected=("dtao_to_pool", "sum"),
+            total_volume=("total_volume", "last"),
+            pending_emission_end=("pending_emission", "last"),
+            end_price=("spot_price", "last"),
+            end_tao_balance=("strategy_tao_balance", "last"),
+            end_dtao_balance=("strategy_dtao_balance", "last"),
+            timestamp=("timestamp", "last")
+        )
+        
+        # ROI与策略get_portfolio_stats口径一致：按当天最后一个区块的余额和价格计算
+        investment = float(self.strategy.total_budget + self.strategy.second_buy_tao_amount)
+        if investment > 0:
+            asset_value = daily["end_tao_balance"] + daily["end_dtao_balance"] * daily["end_price"]
+            daily["strategy_roi"] = (asset_value - investment) / investment * 100
+        else:
+            daily["strategy_roi"] = 0.0
+        
+        tx_counts = dict(self.conn.execute(
+            "SELECT block_number / ?, COUNT(*) FROM transactions GROUP BY 1", (self.blocks_per_day,)
+        ).fetchall())
+        daily["total_transactions"] = [tx_counts.get(day, 0) for day in daily.index]
+        
+        daily = daily.reset_index()[[
+            "day", "blocks_simulated", "avg_price", "total_tao_injected", "total_alpha_injected",
+            "total_volume", "strategy_roi", "total_transactions", "pending_emission_end", "timestamp"
+        ]].astype(object)  # 转为Python标量，sqlite3才能直接绑定
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT INTO daily_summary VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            daily.itertuples(index=False, name=None)
+        )
+        self.conn.execute("COMMIT")
+        self.daily_summary = daily.to_dict("records")
     
     def _generate_final_summary(self, simulation_time) -> Dict[str, Any]:
         """生成最终摘要"""
@@ -459,7 +683,7 @@ class BittensorSubnetSimulator:
         # 保存摘要到文件
         summary_path = os.path.join(self.output_dir, "simulation_summary.json")
         with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+            json.dump(_to_jsonable(summary), f, ensure_ascii=False, indent=2)
         
         return summary
     
@@ -477,25 +701,33 @@ class BittensorSubnetSimulator:
             self.conn = sqlite3.connect(self.db_path)
         
         # 导出区块数据
-        if self.block_data:
-            df_blocks = pd.DataFrame(self.block_data)
+        if self._block_count:
             blocks_path = os.path.join(self.output_dir, "block_data.csv")
-            df_blocks.to_csv(blocks_path, index=False)
+            self._write_block_data_csv(blocks_path)
             file_paths["block_data"] = blocks_path
         
-        # 导出交易数据
+        # 导出交易数据（直接从游标逐批写出，不经过pandas的类型推断）
         try:
-            df_transactions = pd.read_sql_query("SELECT * FROM transactions", self.conn)
-            if not df_transactions.empty:
+            cursor = self.conn.execute(
+                "SELECT id, block_number, transaction_type, tao_amount, dtao_amount, price, slippage, timestamp "
+                "FROM transactions ORDER BY id"
+            )
+            rows = cursor.fetchmany(self._CSV_CHUNK_ROWS)
+            if rows:
                 transactions_path = os.path.join(self.output_dir, "transactions.csv")
-                df_transactions.to_csv(transactions_path, index=False)
+                with open(transactions_path, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f, lineterminator='\n')
+                    writer.writerow([column[0] for column in cursor.description])
+                    while rows:
+                        writer.writerows(rows)
+                        rows = cursor.fetchmany(self._CSV_CHUNK_ROWS)
                 file_paths["transactions"] = transactions_path
         except Exception as e:
             logger.warning(f"导出交易数据失败: {e}")
         
         # 导出策略交易记录
-        if hasattr(self, 'strategy') and self.strategy.transaction_log:
-            strategy_transactions = pd.DataFrame(self.strategy.transaction_log)
+        if hasattr(self, 'strategy') and self.strategy.get_transaction_columns():
+            strategy_transactions = pd.DataFrame(self.strategy.get_transaction_columns())
             if not strategy_transactions.empty:
                 strategy_path = os.path.join(self.output_dir, "strategy_transactions.csv")
                 strategy_transactions.to_csv(strategy_path, index=False)
@@ -504,14 +736,24 @@ class BittensorSubnetSimulator:
         logger.info(f"数据已导出到CSV文件: {list(file_paths.keys())}")
         return file_paths
     
+    def _write_block_data_csv(self, path: str):
+        """把区块数组按块直接写出为CSV（不构造DataFrame，内存占用与块大小相关）"""
+        block_data = self.block_data
+        chunk = self._CSV_CHUNK_ROWS
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(self._BLOCK_DTYPE.names)
+            for start in range(0, len(block_data), chunk):
+                writer.writerows(block_data[start:start + chunk].tolist())
+    
     def get_simulation_stats(self) -> Dict[str, Any]:
         """获取模拟统计信息"""
         # 🔧 修正：获取当前价格以正确计算strategy stats
         current_price = self.amm_pool.get_spot_price()
         
         return {
-            "total_blocks_processed": len(self.block_data),
-            "simulation_progress": len(self.block_data) / self.total_blocks * 100,
+            "total_blocks_processed": self._block_count,
+            "simulation_progress": self._block_count / self.total_blocks * 100,
             "current_day": self.current_day,
             "amm_pool_stats": self.amm_pool.get_pool_stats(),
             "strategy_stats": self.strategy.get_portfolio_stats(current_market_price=current_price),
@@ -575,4 +817,73 @@ class BittensorSubnetSimulator:
 
             self.current_block += 1
 
-        # ... (其他逻辑) ...
\ No newline at end of file
+        # ... (其他逻辑) ...
+
+
+def _run_simulation_worker(config_path: str, output_dir: str) -> Dict[str, Any]:
+    """子进程入口：运行单个配置的模拟并返回摘要"""
+    simulator = BittensorSubnetSimulator(config_path, output_dir)
+    return simulator.run_simulation()
+
+
+def run_simulations_parallel(config_paths: List[str], output_dirs: List[str],
+                             max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    在多个进程中并行运行相互独立的模拟
+    
+    每个配置由单独的模拟器运行，各自使用独立的输出目录和数据库，进程之间无需同步。
+    单次模拟中每个区块都依赖上一区块的AMM池、策略和PendingEmission状态，
+    按区块区间拆分会改变结果，因此只在配置之间并行。
+    
+    Args:
+        config_paths: 配置文件路径列表
+        output_dirs: 与config_paths一一对应的输出目录（不能重复）
+        max_workers: 最大进程数，None表示使用CPU核数
+        
+    Returns:
+        与config_paths顺序一致的模拟摘要列表
+    """
+    if len(config_paths) != len(output_dirs):
+        raise ValueError(f"配置数量与输出目录数量不匹配: {len(config_paths)} != {len(output_dirs)}")
+    if len(set(map(os.path.abspath, output_dirs))) != len(output_dirs):
+        raise ValueError("并行模拟的输出目录不能重复")
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_simulation_worker, config_paths, output_dirs))
+
+
+def run_many(config_paths: List[str], output_root: str,
+             workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    批量运行参数扫描：每个配置在独立进程中模拟，输出到output_root/<序号>
+    
+    各次模拟的关键指标汇总写入output_root/sweep_summary.json。
+    
+    Args:
+        config_paths: 配置文件路径列表
+        output_root: 输出根目录
+        workers: 进程数，None表示使用CPU核数
+        
+    Returns:
+        与config_paths顺序一致的模拟摘要列表
+    """
+    os.makedirs(output_root, exist_ok=True)
+    output_dirs = [os.path.join(output_root, str(i)) for i in range(len(config_paths))]
+    summaries = run_simulations_parallel(config_paths, output_dirs, max_workers=workers)
+    
+    sweep_summary = [
+        {
+            "config_path": config_path,
+            "output_dir": output_dir,
+            "total_roi": summary["key_metrics"]["total_roi"],
+            "final_asset_value": summary["key_metrics"]["final_asset_value"],
+            "final_price": summary["final_pool_state"]["final_price"],
+            "transaction_count": summary["key_metrics"]["transaction_count"]
+        }
+        for config_path, output_dir, summary in zip(config_paths, output_dirs, summaries)
+    ]
+    with open(os.path.join(output_root, "sweep_summary.json"), 'w', encoding='utf-8') as f:
+        json.dump(_to_jsonable(sweep_summary), f, ensure_ascii=False, indent=2)
+    
+    logger.info(f"参数扫描完成: {len(config_paths)}个配置")
+    return summaries
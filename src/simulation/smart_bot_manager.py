@@ -2,16 +2,17 @@
 智能机器人管理器 - 基于V9研究的真实机器人行为
 """
 
-from decimal import Decimal, getcontext
+from decimal import Decimal
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 import random
+from bisect import bisect_right
 from enum import Enum, auto
 from dataclasses import dataclass
+from itertools import accumulate
 import json
 
-# 设置高精度计算
-getcontext().prec = 50
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -36,259 +37,370 @@ class ExitReason(Enum):
 
 @dataclass
 class Position:
-    """仓位信息"""
-    size: Decimal
-    entry_price: Decimal
+    """仓位信息（决策路径只用float，与AMM交互时再转换为Decimal）"""
+    __slots__ = ("size", "entry_price", "entry_block", "target_exit_price", "stop_loss_price")
+    
+    size: float
+    entry_price: float
     entry_block: int
-    target_exit_price: Decimal
-    stop_loss_price: Decimal
+    target_exit_price: float
+    stop_loss_price: float
     
 
 @dataclass
 class TradeMemory:
     """交易记忆"""
-    entry_price: Decimal
-    exit_price: Decimal
-    profit_ratio: Decimal
+    __slots__ = ("entry_price", "exit_price", "profit_ratio", "exit_reason", "hold_blocks", "squeezed")
+    
+    entry_price: float
+    exit_price: float
+    profit_ratio: float
     exit_reason: ExitReason
     hold_blocks: int
     squeezed: bool  # 是否被绞杀
 
 
+# 决策函数使用的整数编码：机器人类型按BotType定义顺序编号，退出原因使用ExitReason的值
+_TYPE_HF_SHORT, _TYPE_HF_MEDIUM, _TYPE_HF_LONG, _TYPE_WHALE, _TYPE_OPPORTUNIST = range(5)
+_BOT_TYPE_CODES = {bot_type: code for code, bot_type in enumerate(BotType)}
+_EXIT_REASONS = {reason.value: reason for reason in ExitReason}
+_EXIT_NONE = 0
+_EXIT_PANIC_CHECK = -1  # 满足恐慌条件，是否卖出由调用方按风险偏好随机决定
+
+
+def _decide_enter(current_price: float, entry_threshold: float, available_capital: float,
+                  position_size_ratio: float, confidence: float, patience_blocks: int,
+                  last_trade_block: int, current_block: int, trend: float, volatility: float,
+                  short_term: bool) -> Tuple[bool, float]:
+    """
+    入场规则中的纯数值部分：冷却期、波动率、趋势检查和仓位计算
+    
+    只接收标量参数、不读写机器人状态，价格阈值、绞杀区间等带副作用的检查由SmartBot.should_enter处理
+    
+    Returns:
+        (是否入场, 仓位大小)
+    """
+    # 检查冷却期
+    if current_block - last_trade_block < patience_blocks:
+        return False, 0.0
+        
+    # 波动率检查
+    if volatility > 0.3:  # 波动太大
+        return False, 0.0
+        
+    # 趋势检查（short_term：HF_SHORT/OPPORTUNIST）
+    if short_term:
+        # 短线喜欢下跌趋势（抄底）
+        if trend > 0.05:
+            return False, 0.0
+    else:
+        # 长线避免明显下跌
+        if trend < -0.1:
+            return False, 0.0
+            
+    return True, _position_size(current_price, entry_threshold, available_capital,
+                                position_size_ratio, confidence)
+
+
+def _position_size(current_price: float, entry_threshold: float, available_capital: float,
+                   position_size_ratio: float, confidence: float) -> float:
+    """计算仓位大小"""
+    # 基础仓位
+    base_size = available_capital * position_size_ratio
+    
+    # 根据信心调整
+    size_multiplier = confidence * 1.5 + 0.5  # 0.5-2.0x
+    
+    # 根据价格位置调整
+    price_discount = (entry_threshold - current_price) / entry_threshold
+    if price_discount > 0.5:  # 价格很低
+        size_multiplier *= 1.5
+        
+    final_size = base_size * size_multiplier
+    
+    # 确保不超过可用资金
+    return min(final_size, available_capital * 0.95)
+
+
+def _decide_exit(price_change: float, holding_time: int, stop_loss_ratio: float,
+                 take_profit_target: float, holding_blocks: int,
+                 bot_type_code: int) -> Tuple[int, float]:
+    """
+    退出规则的纯数值部分
+    
+    Returns:
+        (退出原因编码, 退出比例)；编码为ExitReason的值，_EXIT_NONE表示不退出，
+        _EXIT_PANIC_CHECK表示满足恐慌条件（与逐步退出的条件互斥）
+    """
+    # 止损检查（最优先）
+    if price_change <= stop_loss_ratio:
+        return ExitReason.STOP_LOSS.value, 1.0
+        
+    # 止盈检查
+    if price_change >= take_profit_target:
+        # 部分止盈
+        if bot_type_code == _TYPE_HF_LONG or bot_type_code == _TYPE_WHALE:
+            return ExitReason.TAKE_PROFIT.value, 0.5  # 卖出一半
+        return ExitReason.TAKE_PROFIT.value, 1.0
+        
+    # 时间止损
+    if holding_time > holding_blocks * 2:
+        return ExitReason.TIME_OUT.value, 1.0
+        
+    # 恐慌检查（快速下跌但未到止损）
+    if price_change < -0.2 and holding_time < 100:
+        return _EXIT_PANIC_CHECK, 1.0
+        
+    # 逐步退出（长线策略）
+    if bot_type_code == _TYPE_HF_LONG and price_change > 0.1:
+        if holding_time > holding_blocks * 0.7:
+            return ExitReason.GRADUAL_EXIT.value, 0.3
+            
+    return _EXIT_NONE, 0.0
+
+
 class SmartBot:
     """智能机器人 - 基于V9研究的真实行为"""
     
-    def __init__(self, bot_id: str, bot_type: BotType, capital: Decimal):
+    __slots__ = (
+        "bot_id", "bot_type", "_type_code", "_type_value", "_is_short_term", "total_capital",
+        # 参数（_init_parameters/_add_personality）
+        "base_entry_threshold", "holding_blocks", "stop_loss_ratio", "take_profit_ratio",
+        "patience_blocks", "position_size_ratio", "entry_threshold", "risk_tolerance",
+        "_panic_threshold", "learning_rate",
+        # 状态跟踪
+        "positions", "_open_capital", "trade_history", "observation_start", "last_trade_block",
+        # 学习参数
+        "confidence", "squeeze_memory", "_squeeze_lo", "_squeeze_hi", "_squeeze_hi_max",
+        "profit_target_adjustment",
+        # 随机数
+        "_rng", "_uniform_buf", "_uniform_idx",
+    )
+    
+    # 每次批量生成的均匀随机数个数
+    _UNIFORM_BUFFER_SIZE = 256
+    # 保留的最近被绞杀区间个数
+    _SQUEEZE_MEMORY_LIMIT = 64
+    
+    def __init__(self, bot_id: str, bot_type: BotType, capital: Decimal,
+                 personality: Optional[Tuple[float, float, float]] = None):
+        """
+        Args:
+            bot_id: 机器人ID
+            bot_type: 机器人类型
+            capital: 资金
+            personality: (参数浮动系数, 风险偏好, 学习率)；为None时由机器人自行随机生成
+        """
         self.bot_id = bot_id
         self.bot_type = bot_type
-        self.total_capital = capital
+        # 类型相关的常量只计算一次
+        self._type_code = _BOT_TYPE_CODES[bot_type]
+        self._type_value = bot_type.value
+        self._is_short_term = self._type_code in (_TYPE_HF_SHORT, _TYPE_OPPORTUNIST)
+        # 每区块的决策计算不需要50位精度，机器人内部状态统一使用float
+        self.total_capital = float(capital)
         
         # 根据V9研究设置参数
-        self._init_parameters()
+        self._init_parameters(personality)
         
         # 状态跟踪
         self.positions: List[Position] = []
+        self._open_capital = 0.0  # 所有未平仓位的size之和，随仓位增减同步更新
         self.trade_history: List[TradeMemory] = []
         self.observation_start: Optional[int] = None
         self.last_trade_block: int = 0
         
         # 学习参数
-        self.confidence = Decimal("0.5")
-        self.squeeze_memory = []  # 记录被绞杀的价格区间
-        self.profit_target_adjustment = Decimal("0")  # 动态调整止盈目标
-        
-    def _init_parameters(self):
+        self.confidence = 0.5
+        self.squeeze_memory = []  # 记录被绞杀的价格区间（按发生顺序，只保留最近的区间）
+        # 按下界排序的区间索引，_squeeze_hi_max[i]为前i+1个区间上界的最大值（见_squeeze_hits）
+        self._squeeze_lo: List[float] = []
+        self._squeeze_hi: List[float] = []
+        self._squeeze_hi_max: List[float] = []
+        self.profit_target_adjustment = 0.0  # 动态调整止盈目标
+        
+        # 决策用的独立随机数生成器，种子取自全局random（random.seed()后结果仍可复现）；
+        # 均匀随机数按批生成，首次使用时才分配缓冲区
+        self._rng = np.random.default_rng(random.getrandbits(64))
+        self._uniform_buf: Optional[List[float]] = None
+        self._uniform_idx = 0
+        
+    def _rand(self) -> float:
+        """取一个[0, 1)均匀随机数"""
+        if self._uniform_buf is None or self._uniform_idx == self._UNIFORM_BUFFER_SIZE:
+            self._uniform_buf = self._rng.random(self._UNIFORM_BUFFER_SIZE).tolist()
+            self._uniform_idx = 0
+        value = self._uniform_buf[self._uniform_idx]
+        self._uniform_idx += 1
+        return value
+        
+    def _init_parameters(self, personality: Optional[Tuple[float, float, float]] = None):
         """根据V9研究初始化参数"""
         # 基于V9的核心发现：<0.003 TAO是硬编码入场阈值
-        self.base_entry_threshold = Decimal("0.003")
+        self.base_entry_threshold = 0.003
         
         # 不同类型的参数差异
         if self.bot_type == BotType.HF_SHORT:
             self.holding_blocks = 2160    # 0.3天
-            self.stop_loss_ratio = Decimal("-0.5")    # 激进止损
-            self.take_profit_ratio = Decimal("0.08")  # 快速止盈 8%
+            self.stop_loss_ratio = -0.5    # 激进止损
+            self.take_profit_ratio = 0.08  # 快速止盈 8%
             self.patience_blocks = 50      # 短暂观察
-            self.position_size_ratio = Decimal("0.5")  # 半仓
+            self.position_size_ratio = 0.5  # 半仓
             
         elif self.bot_type == BotType.HF_MEDIUM:
             self.holding_blocks = 20160   # 2.8天
-            self.stop_loss_ratio = Decimal("-0.672")  # 标准止损 -67.2%
-            self.take_profit_ratio = Decimal("0.15")  # 中等止盈 15%
+            self.stop_loss_ratio = -0.672  # 标准止损 -67.2%
+            self.take_profit_ratio = 0.15  # 中等止盈 15%
             self.patience_blocks = 100
-            self.position_size_ratio = Decimal("0.3")
+            self.position_size_ratio = 0.3
             
         elif self.bot_type == BotType.HF_LONG:
             self.holding_blocks = 138240  # 19.2天
-            self.stop_loss_ratio = Decimal("-0.8")    # 宽松止损
-            self.take_profit_ratio = Decimal("0.25")  # 长线目标 25%
+            self.stop_loss_ratio = -0.8    # 宽松止损
+            self.take_profit_ratio = 0.25  # 长线目标 25%
             self.patience_blocks = 200
-            self.position_size_ratio = Decimal("0.2")
+            self.position_size_ratio = 0.2
             
         elif self.bot_type == BotType.WHALE:
             self.holding_blocks = 72000   # 10天
-            self.stop_loss_ratio = Decimal("-0.9")    # 超宽松
-            self.take_profit_ratio = Decimal("0.3")   # 大目标 30%
+            self.stop_loss_ratio = -0.9    # 超宽松
+            self.take_profit_ratio = 0.3   # 大目标 30%
             self.patience_blocks = 500
-            self.position_size_ratio = Decimal("0.8")  # 重仓
+            self.position_size_ratio = 0.8  # 重仓
             
         else:  # OPPORTUNIST
             self.holding_blocks = 7200    # 1天
-            self.stop_loss_ratio = Decimal("-0.4")    # 严格止损
-            self.take_profit_ratio = Decimal("0.1")   # 见好就收 10%
+            self.stop_loss_ratio = -0.4    # 严格止损
+            self.take_profit_ratio = 0.1   # 见好就收 10%
             self.patience_blocks = 20
-            self.position_size_ratio = Decimal("0.4")
+            self.position_size_ratio = 0.4
             
         # 添加随机性
-        self._add_personality()
+        if personality is None:
+            personality = (random.uniform(0.8, 1.2), random.uniform(0.3, 0.8), random.uniform(0.05, 0.2))
+        self._add_personality(*personality)
         
-    def _add_personality(self):
-        """添加个性化参数，使机器人行为更真实"""
-        # ±20%的随机性
-        variance = Decimal(str(random.uniform(0.8, 1.2)))
+    def _add_personality(self, variance: float, risk_tolerance: float, learning_rate: float):
+        """
+        添加个性化参数，使机器人行为更真实
         
+        Args:
+            variance: 参数浮动系数（0.8-1.2，即±20%的随机性）
+            risk_tolerance: 风险偏好（0.3-0.8）
+            learning_rate: 学习能力（0.05-0.2）
+        """
         self.entry_threshold = self.base_entry_threshold * variance
         self.stop_loss_ratio = self.stop_loss_ratio * variance
         self.take_profit_ratio = self.take_profit_ratio * variance
         
         # 风险偏好
-        self.risk_tolerance = Decimal(str(random.uniform(0.3, 0.8)))
+        self.risk_tolerance = risk_tolerance
+        self._panic_threshold = 1 - risk_tolerance  # 恐慌卖出概率
         
         # 学习能力
-        self.learning_rate = Decimal(str(random.uniform(0.05, 0.2)))
-        
-    def observe_market(self, current_price: Decimal, current_block: int, 
-                      price_history: List[Tuple[int, Decimal]]) -> Dict[str, Any]:
-        """观察市场并分析"""
-        # 计算近期波动率
-        if len(price_history) >= 10:
-            recent_prices = [p[1] for p in price_history[-10:]]
-            avg_price = sum(recent_prices) / len(recent_prices)
-            volatility = sum(abs(p - avg_price) for p in recent_prices) / len(recent_prices) / avg_price
-        else:
-            volatility = Decimal("0.1")  # 默认波动率
-            
-        # 计算趋势
-        if len(price_history) >= 20:
-            older_avg = sum(p[1] for p in price_history[-20:-10]) / 10
-            newer_avg = sum(p[1] for p in price_history[-10:]) / 10
-            trend = (newer_avg - older_avg) / older_avg
-        else:
-            trend = Decimal("0")
-            
-        return {
-            "volatility": volatility,
-            "trend": trend,
-            "current_price": current_price,
-            "observation_blocks": current_block - (self.observation_start or current_block)
-        }
+        self.learning_rate = learning_rate
         
-    def should_enter(self, current_price: Decimal, current_block: int,
-                    market_analysis: Dict[str, Any]) -> Tuple[bool, Decimal]:
+    def should_enter(self, current_price: float, current_block: int,
+                    volatility: float = 0.1, trend: float = 0.0) -> Tuple[bool, float]:
         """
         决定是否入场
         基于V9核心发现：绝对价格 < 0.003 TAO
+        
+        Args:
+            current_price: 当前价格
+            current_block: 当前区块
+            volatility: 市场波动率（见SmartBotManager._analyze_market）
+            trend: 市场趋势
         """
         # 已经有仓位的情况
-        current_position = sum(p.size for p in self.positions)
-        if current_position >= self.total_capital * Decimal("0.9"):
-            return False, Decimal("0")
+        current_position = self._open_capital
+        if current_position >= self.total_capital * 0.9:
+            return False, 0.0
             
         # V9核心：价格必须低于阈值
         if current_price >= self.entry_threshold:
             # 开始观察但不入场
             if self.observation_start is None:
                 self.observation_start = current_block
-            return False, Decimal("0")
+            return False, 0.0
             
-        # 检查是否在被绞杀的价格区间
-        for squeeze_range in self.squeeze_memory:
-            if squeeze_range[0] <= current_price <= squeeze_range[1]:
-                # 降低在这个区间的入场概率
-                if random.random() > 0.2:  # 80%概率跳过
-                    return False, Decimal("0")
+        # 检查是否在被绞杀的价格区间（每个命中的区间都降低入场概率）
+        for _ in range(self._squeeze_hits(current_price)):
+            if self._rand() > 0.2:  # 80%概率跳过
+                return False, 0.0
                     
-        # 检查冷却期
-        if current_block - self.last_trade_block < self.patience_blocks:
-            return False, Decimal("0")
-            
-        # 波动率检查
-        volatility = market_analysis.get("volatility", Decimal("0.1"))
-        if volatility > Decimal("0.3"):  # 波动太大
-            return False, Decimal("0")
-            
-        # 趋势检查
-        trend = market_analysis.get("trend", Decimal("0"))
-        if self.bot_type in [BotType.HF_SHORT, BotType.OPPORTUNIST]:
-            # 短线喜欢下跌趋势（抄底）
-            if trend > Decimal("0.05"):
-                return False, Decimal("0")
-        else:
-            # 长线避免明显下跌
-            if trend < Decimal("-0.1"):
-                return False, Decimal("0")
-                
-        # 计算仓位大小
-        position_size = self._calculate_position_size(current_price, market_analysis)
-        
-        return True, position_size
+        # 冷却期、波动率、趋势检查和仓位计算
+        return _decide_enter(
+            current_price, self.entry_threshold, self.total_capital - current_position,
+            self.position_size_ratio, self.confidence, self.patience_blocks,
+            self.last_trade_block, current_block, trend, volatility, self._is_short_term
+        )
         
-    def _calculate_position_size(self, current_price: Decimal, 
-                                market_analysis: Dict[str, Any]) -> Decimal:
+    def _calculate_position_size(self, current_price: float) -> float:
         """计算仓位大小"""
-        available_capital = self.total_capital - sum(p.size for p in self.positions)
-        
-        # 基础仓位
-        base_size = available_capital * self.position_size_ratio
-        
-        # 根据信心调整
-        size_multiplier = self.confidence * Decimal("1.5") + Decimal("0.5")  # 0.5-2.0x
-        
-        # 根据价格位置调整
-        price_discount = (self.entry_threshold - current_price) / self.entry_threshold
-        if price_discount > Decimal("0.5"):  # 价格很低
-            size_multiplier *= Decimal("1.5")
-            
-        final_size = base_size * size_multiplier
-        
-        # 确保不超过可用资金
-        return min(final_size, available_capital * Decimal("0.95"))
+        available_capital = self.total_capital - self._open_capital
+        return _position_size(current_price, self.entry_threshold, available_capital,
+                              self.position_size_ratio, self.confidence)
         
-    def should_exit(self, position: Position, current_price: Decimal, 
-                   current_block: int) -> Tuple[bool, ExitReason, Decimal]:
+    def should_exit(self, position: Position, current_price: float, 
+                   current_block: int) -> Tuple[bool, ExitReason, float]:
         """
         决定是否退出
         返回：(是否退出, 退出原因, 退出比例)
         """
-        holding_time = current_block - position.entry_block
         price_change = (current_price - position.entry_price) / position.entry_price
+        reason_code, exit_ratio = _decide_exit(
+            price_change, current_block - position.entry_block, self.stop_loss_ratio,
+            self.take_profit_ratio + self.profit_target_adjustment, self.holding_blocks,
+            self._type_code
+        )
+        
+        if reason_code == _EXIT_NONE:
+            return False, None, 0.0
+        
+        if reason_code == _EXIT_PANIC_CHECK:
+            # 恐慌卖出的概率取决于风险偏好
+            if self._rand() < self._panic_threshold:
+                return True, ExitReason.PANIC_SELL, exit_ratio
+            return False, None, 0.0
         
-        # 止损检查（最优先）
-        if price_change <= self.stop_loss_ratio:
+        reason = _EXIT_REASONS[reason_code]
+        if reason == ExitReason.STOP_LOSS:
             # 记录被绞杀
             self._record_squeeze(position.entry_price, current_price)
-            return True, ExitReason.STOP_LOSS, Decimal("1.0")
-            
-        # 止盈检查
-        adjusted_target = self.take_profit_ratio + self.profit_target_adjustment
-        if price_change >= adjusted_target:
-            # 部分止盈
-            if self.bot_type in [BotType.HF_LONG, BotType.WHALE]:
-                return True, ExitReason.TAKE_PROFIT, Decimal("0.5")  # 卖出一半
-            else:
-                return True, ExitReason.TAKE_PROFIT, Decimal("1.0")
-                
-        # 时间止损
-        if holding_time > self.holding_blocks * 2:
-            return True, ExitReason.TIME_OUT, Decimal("1.0")
-            
-        # 恐慌检查（快速下跌但未到止损）
-        if price_change < Decimal("-0.2") and holding_time < 100:
-            if random.random() < float(1 - self.risk_tolerance):
-                return True, ExitReason.PANIC_SELL, Decimal("1.0")
-                
-        # 逐步退出（长线策略）
-        if self.bot_type == BotType.HF_LONG and price_change > Decimal("0.1"):
-            if holding_time > self.holding_blocks * 0.7:
-                return True, ExitReason.GRADUAL_EXIT, Decimal("0.3")
-                
-        return False, None, Decimal("0")
+        return True, reason, exit_ratio
         
-    def _record_squeeze(self, entry_price: Decimal, exit_price: Decimal):
+    def _squeeze_hits(self, price: float) -> int:
+        """包含price的被绞杀区间个数（二分定位下界不超过price的区间，上界最大值不足时直接返回0）"""
+        n = bisect_right(self._squeeze_lo, price)
+        if n == 0 or self._squeeze_hi_max[n - 1] < price:
+            return 0
+        return sum(1 for hi in self._squeeze_hi[:n] if hi >= price)
+        
+    def _record_squeeze(self, entry_price: float, exit_price: float):
         """记录被绞杀的经历"""
         # 记录危险价格区间
         danger_zone = (
-            min(entry_price, exit_price) * Decimal("0.9"),
-            max(entry_price, exit_price) * Decimal("1.1")
+            min(entry_price, exit_price) * 0.9,
+            max(entry_price, exit_price) * 1.1
         )
         self.squeeze_memory.append(danger_zone)
+        if len(self.squeeze_memory) > self._SQUEEZE_MEMORY_LIMIT:
+            self.squeeze_memory.pop(0)
+        
+        # 重建按下界排序的区间索引（只在止损时发生，频率很低）
+        zones = sorted(self.squeeze_memory)
+        self._squeeze_lo = [zone[0] for zone in zones]
+        self._squeeze_hi = [zone[1] for zone in zones]
+        self._squeeze_hi_max = list(accumulate(self._squeeze_hi, max))
         
         # 降低信心
-        self.confidence *= Decimal("0.8")
-        self.confidence = max(self.confidence, Decimal("0.1"))  # 最低0.1
+        self.confidence *= 0.8
+        self.confidence = max(self.confidence, 0.1)  # 最低0.1
         
         # 调整参数
-        self.stop_loss_ratio *= Decimal("1.1")  # 放宽止损
-        self.profit_target_adjustment -= Decimal("0.02")  # 降低盈利预期
+        self.stop_loss_ratio *= 1.1  # 放宽止损
+        self.profit_target_adjustment -= 0.02  # 降低盈利预期
         
     def learn_from_trade(self, memory: TradeMemory):
         """从交易中学习"""
@@ -297,11 +409,11 @@ class SmartBot:
             pass
         elif memory.profit_ratio > 0:
             # 盈利交易，增加信心
-            self.confidence *= Decimal("1.1")
-            self.confidence = min(self.confidence, Decimal("0.9"))  # 最高0.9
+            self.confidence *= 1.1
+            self.confidence = min(self.confidence, 0.9)  # 最高0.9
         else:
             # 亏损但非绞杀
-            self.confidence *= Decimal("0.95")
+            self.confidence *= 0.95
             
         # 更新上次交易时间
         self.last_trade_block += memory.hold_blocks
@@ -322,12 +434,16 @@ class SmartBotManager:
             "OPPORTUNIST": 0.10
         })
         
-        # 价格历史
-        self.price_history: List[Tuple[int, Decimal]] = []
+        # 价格历史：预分配的float64环形缓冲区，_head为下一个写入位置，_count为有效条数
         self.max_history = 100
+        self._prices = np.empty(self.max_history, dtype=np.float64)
+        self._blocks = np.empty(self.max_history, dtype=np.int64)
+        self._head = 0
+        self._count = 0
         
         # 初始化机器人
         self.bots: List[SmartBot] = []
+        self._bots_by_type: Dict[BotType, List[SmartBot]] = {bot_type: [] for bot_type in BotType}
         self._initialize_bots()
         
         # 统计跟踪
@@ -336,15 +452,32 @@ class SmartBotManager:
         self.total_volume = Decimal("0")
         self.bots_squeezed = 0
         
+        # 按类型累计的已平仓交易统计（随平仓增量更新，供get_simulation_summary直接读取）；
+        # 与原口径一致，spent/received按非恐慌卖出交易的入场/退出价格累计
+        self._type_trades: Dict[str, int] = {bot_type.value: 0 for bot_type in BotType}
+        self._type_spent: Dict[str, float] = {bot_type.value: 0.0 for bot_type in BotType}
+        self._type_received: Dict[str, float] = {bot_type.value: 0.0 for bot_type in BotType}
+        
     def _initialize_bots(self):
         """初始化机器人群体"""
+        type_counts = [
+            (bot_type_name, ratio, max(1, int(self.num_bots * ratio)))  # 至少1个
+            for bot_type_name, ratio in self.bot_types.items()
+            if ratio > 0  # 跳过比例为0的类型
+        ]
+        
+        # 所有机器人的个性化参数一次性生成（种子取自全局random，random.seed()后仍可复现）
+        total_count = sum(type_count for _, _, type_count in type_counts)
+        rng = np.random.default_rng(random.getrandbits(64))
+        personalities = zip(
+            rng.uniform(0.8, 1.2, total_count).tolist(),
+            rng.uniform(0.3, 0.8, total_count).tolist(),
+            rng.uniform(0.05, 0.2, total_count).tolist()
+        )
+        
         # 按类型分配资金
-        for bot_type_name, ratio in self.bot_types.items():
-            if ratio <= 0:
-                continue  # 跳过比例为0的类型
-                
+        for bot_type_name, ratio, type_count in type_counts:
             bot_type = BotType(bot_type_name)
-            type_count = max(1, int(self.num_bots * ratio))  # 至少1个
             
             # 计算每个机器人的资金
             type_capital = self.total_capital * Decimal(str(ratio))
@@ -352,67 +485,98 @@ class SmartBotManager:
             
             for i in range(type_count):
                 bot_id = f"{bot_type_name}_{i}"
-                bot = SmartBot(bot_id, bot_type, capital_per_bot)
+                bot = SmartBot(bot_id, bot_type, capital_per_bot, next(personalities))
                 self.bots.append(bot)
+                self._bots_by_type[bot_type].append(bot)
+        
+        # 入场筛选用的按列状态（下标与self.bots一致）：入场阈值固定不变，
+        # 是否已开始观察、是否持仓、冷却期结束区块在每次处理该机器人后更新
+        self._entry_thresholds = np.array([bot.entry_threshold for bot in self.bots], dtype=np.float64)
+        self._observing = np.zeros(len(self.bots), dtype=bool)
+        self._has_positions = np.zeros(len(self.bots), dtype=bool)
+        self._wake_blocks = np.array([bot.last_trade_block + bot.patience_blocks for bot in self.bots],
+                                     dtype=np.int64)
                 
         logger.info(f"初始化 {len(self.bots)} 个智能机器人")
         
     def process_block(self, current_block: int, current_price: Decimal, 
                      amm_pool) -> List[Dict[str, Any]]:
         """处理区块，返回所有交易"""
-        # 更新价格历史
-        self.price_history.append((current_block, current_price))
-        if len(self.price_history) > self.max_history:
-            self.price_history.pop(0)
+        # 决策全部基于float价格，只在调用AMM时转换回Decimal
+        price = float(current_price)
+        
+        # 更新价格历史（写满后覆盖最旧的一条）
+        self._prices[self._head] = price
+        self._blocks[self._head] = current_block
+        self._head = (self._head + 1) % self.max_history
+        if self._count < self.max_history:
+            self._count += 1
             
-        # 市场分析（共享）
+        # 市场分析（每区块只计算一次，所有机器人直接共用同一结果）
         market_analysis = self._analyze_market()
+        volatility = market_analysis["volatility"]
+        trend = market_analysis["trend"]
         
         trades = []
         
-        for bot in self.bots:
-            # 让机器人观察市场
-            bot_analysis = bot.observe_market(current_price, current_block, self.price_history)
-            combined_analysis = {**market_analysis, **bot_analysis}
+        # 只处理可能产生动作的机器人：持仓（需要检查退出）、价格低于入场阈值且已过冷却期，
+        # 或尚未开始观察（需要记录观察起点）。其余机器人的should_enter必然返回False
+        # （冷却期内跳过的机器人不再消耗绞杀区间检查的随机数）
+        bots = self.bots
+        candidates = np.flatnonzero(
+            ((price < self._entry_thresholds) & (self._wake_blocks <= current_block))
+            | ~self._observing | self._has_positions
+        )
+        
+        for bot_index in candidates.tolist():
+            bot = bots[bot_index]
             
-            # 处理现有仓位
+            # 处理现有仓位：一次遍历分出保留的仓位和需要平仓的仓位
+            survivors = []
             positions_to_close = []
-            for i, position in enumerate(bot.positions):
+            for position in bot.positions:
                 should_exit, reason, exit_ratio = bot.should_exit(
-                    position, current_price, current_block
+                    position, price, current_block
                 )
                 
                 if should_exit:
-                    positions_to_close.append((i, reason, exit_ratio))
+                    positions_to_close.append((position, reason, exit_ratio))
+                else:
+                    survivors.append(position)
+            if positions_to_close:
+                bot.positions = survivors
                     
-            # 执行平仓（倒序处理避免索引问题）
-            for i, reason, exit_ratio in reversed(positions_to_close):
-                position = bot.positions.pop(i)
+            # 执行平仓（保持原有的倒序成交顺序，部分平仓的剩余仓位追加到末尾）
+            for position, reason, exit_ratio in reversed(positions_to_close):
+                bot._open_capital -= position.size
                 exit_size = position.size * exit_ratio
                 
                 # 执行卖出
-                dtao_to_sell = exit_size / current_price
-                result = amm_pool.swap_dtao_for_tao(dtao_to_sell)
+                dtao_to_sell = exit_size / price
+                result = amm_pool.swap_dtao_for_tao(Decimal(repr(dtao_to_sell)))
                 
                 if result["success"]:
+                    tao_received = float(result["tao_received"])
+                    
                     # 记录交易
                     trade = {
                         "bot_id": bot.bot_id,
-                        "bot_type": bot.bot_type.value,
+                        "bot_type": bot._type_value,
                         "action": "sell",
-                        "dtao_amount": float(dtao_to_sell),
-                        "tao_received": float(result["tao_received"]),
-                        "price": float(current_price),
+                        "dtao_amount": dtao_to_sell,
+                        "tao_received": tao_received,
+                        "price": price,
                         "reason": reason.name,
                         "block": current_block
                     }
                     trades.append(trade)
                     
-                    # 创建交易记忆
-                    profit_ratio = (result["tao_received"] - position.size) / position.size
+                    # 创建交易记忆（收益率用float计算；连续部分止盈后仓位可能下溢为0）
+                    closed_size = position.size
+                    profit_ratio = (tao_received - closed_size) / closed_size if closed_size else 0.0
                     memory = TradeMemory(
                         entry_price=position.entry_price,
-                        exit_price=current_price,
+                        exit_price=price,
                         profit_ratio=profit_ratio,
                         exit_reason=reason,
                         hold_blocks=current_block - position.entry_block,
@@ -427,10 +591,15 @@ class SmartBotManager:
                         self.successful_trades += 1
                     if reason == ExitReason.STOP_LOSS:
                         self.bots_squeezed += 1
+                    type_value = bot._type_value
+                    self._type_trades[type_value] += 1
+                    if reason != ExitReason.PANIC_SELL:
+                        self._type_spent[type_value] += position.entry_price
+                        self._type_received[type_value] += price
                         
                     # 如果是部分平仓，创建新的仓位
-                    if exit_ratio < Decimal("1.0"):
-                        remaining_size = position.size * (Decimal("1.0") - exit_ratio)
+                    if exit_ratio < 1.0:
+                        remaining_size = position.size * (1.0 - exit_ratio)
                         new_position = Position(
                             size=remaining_size,
                             entry_price=position.entry_price,
@@ -439,85 +608,122 @@ class SmartBotManager:
                             stop_loss_price=position.stop_loss_price
                         )
                         bot.positions.append(new_position)
+                        bot._open_capital += remaining_size
+            
+            # 全部平仓后归零，避免浮点累计误差残留
+            if not bot.positions:
+                bot._open_capital = 0.0
                         
             # 检查是否应该建仓
             should_enter, position_size = bot.should_enter(
-                current_price, current_block, combined_analysis
+                price, current_block, volatility, trend
             )
             
             if should_enter and position_size > 0:
                 # 执行买入
-                result = amm_pool.swap_tao_for_dtao(position_size)
+                tao_amount = Decimal(repr(position_size))
+                result = amm_pool.swap_tao_for_dtao(tao_amount)
                 
                 if result["success"]:
                     # 创建新仓位
                     new_position = Position(
                         size=position_size,
-                        entry_price=current_price,
+                        entry_price=price,
                         entry_block=current_block,
-                        target_exit_price=current_price * (Decimal("1") + bot.take_profit_ratio),
-                        stop_loss_price=current_price * (Decimal("1") + bot.stop_loss_ratio)
+                        target_exit_price=price * (1 + bot.take_profit_ratio),
+                        stop_loss_price=price * (1 + bot.stop_loss_ratio)
                     )
                     bot.positions.append(new_position)
+                    bot._open_capital += position_size
                     bot.last_trade_block = current_block
                     
                     # 记录交易
                     trade = {
                         "bot_id": bot.bot_id,
-                        "bot_type": bot.bot_type.value,
+                        "bot_type": bot._type_value,
                         "action": "buy",
-                        "tao_amount": float(position_size),
+                        "tao_amount": position_size,
                         "dtao_received": float(result["dtao_received"]),
-                        "price": float(current_price),
+                        "price": price,
                         "block": current_block
                     }
                     trades.append(trade)
                     
-                    self.total_volume += position_size
+                    self.total_volume += tao_amount
+            
+            self._has_positions[bot_index] = bool(bot.positions)
+            self._observing[bot_index] = bot.observation_start is not None
+            # 买入和平仓学习（learn_from_trade）都会推后上次交易区块
+            self._wake_blocks[bot_index] = bot.last_trade_block + bot.patience_blocks
                     
         return trades
         
-    def _analyze_market(self) -> Dict[str, Any]:
-        """分析整体市场状况"""
-        if len(self.price_history) < 2:
-            return {"market_trend": "unknown", "volatility": Decimal("0.1")}
-            
-        # 计算短期和长期趋势
-        short_window = min(10, len(self.price_history))
-        long_window = min(50, len(self.price_history))
+    @property
+    def price_history(self) -> List[Tuple[int, float]]:
+        """按时间顺序排列的(区块号, 价格)历史（从环形缓冲区构建）"""
+        start = self._head - self._count
+        blocks = np.concatenate((self._blocks[start:], self._blocks[:self._head])) if start < 0 else self._blocks[start:self._head]
+        return list(zip(blocks.tolist(), self._recent_prices(self._count).tolist()))
         
-        short_avg = sum(p[1] for p in self.price_history[-short_window:]) / short_window
-        long_avg = sum(p[1] for p in self.price_history[-long_window:]) / long_window
+    def _recent_prices(self, n: int) -> np.ndarray:
+        """最近n条价格（按时间顺序，n不超过已记录条数）"""
+        start = self._head - n
+        if start >= 0:
+            return self._prices[start:self._head]
+        return np.concatenate((self._prices[start:], self._prices[:self._head]))
         
+    def _analyze_market(self) -> Dict[str, Any]:
+        """
+        分析整体市场状况（每区块计算一次，所有机器人共用）
+        
+        volatility/trend为机器人入场判断使用的指标：最近10个区块的平均绝对偏差/均价，
+        以及最近10个区块相对之前10个区块的均价变化；数据不足时分别取0.1和0
+        """
+        count = self._count
+        if count < 2:
+            return {"market_trend": "unknown", "volatility": 0.1, "trend": 0.0}
+        
+        # 最近50个区块的价格只取出一次，各窗口都是它的切片视图
+        prices = self._recent_prices(min(50, count))
+        short_prices = prices[-10:]
+        short_avg = float(short_prices.mean())
+        long_avg = float(prices.mean())
+        
+        # 机器人使用的波动率和趋势（最近10个区块即短期窗口）
+        if count >= 10:
+            volatility = float(np.abs(short_prices - short_avg).mean() / short_avg)
+        else:
+            volatility = 0.1
+        if count >= 20:
+            older_avg = float(prices[-20:-10].mean())
+            trend = (short_avg - older_avg) / older_avg
+        else:
+            trend = 0.0
+            
         # 趋势判断
-        if short_avg > long_avg * Decimal("1.05"):
-            trend = "bullish"
-        elif short_avg < long_avg * Decimal("0.95"):
-            trend = "bearish"
+        if short_avg > long_avg * 1.05:
+            market_trend = "bullish"
+        elif short_avg < long_avg * 0.95:
+            market_trend = "bearish"
         else:
-            trend = "neutral"
+            market_trend = "neutral"
             
-        # 波动率
-        recent_prices = [p[1] for p in self.price_history[-short_window:]]
-        volatility = self._calculate_volatility(recent_prices)
-        
         return {
-            "market_trend": trend,
+            "market_trend": market_trend,
             "volatility": volatility,
-            "short_avg": float(short_avg),
-            "long_avg": float(long_avg)
+            "trend": trend,
+            "price_volatility": self._calculate_volatility(short_prices),
+            "short_avg": short_avg,
+            "long_avg": long_avg
         }
         
-    def _calculate_volatility(self, prices: List[Decimal]) -> Decimal:
-        """计算价格波动率"""
+    def _calculate_volatility(self, prices: np.ndarray) -> float:
+        """计算价格波动率（总体标准差/均值）"""
         if len(prices) < 2:
-            return Decimal("0.1")
+            return 0.1
             
-        avg = sum(prices) / len(prices)
-        variance = sum((p - avg) ** 2 for p in prices) / len(prices)
-        std_dev = variance ** Decimal("0.5")
-        
-        return std_dev / avg if avg > 0 else Decimal("0.1")
+        avg = float(prices.mean())
+        return float(prices.std()) / avg if avg > 0 else 0.1
         
     def get_active_stats(self) -> Dict[str, Any]:
         """获取当前活跃状态"""
@@ -528,7 +734,7 @@ class SmartBotManager:
         # 按类型统计
         type_stats = {}
         for bot_type in BotType:
-            type_bots = [b for b in self.bots if b.bot_type == bot_type]
+            type_bots = self._bots_by_type[bot_type]
             type_stats[bot_type.value] = {
                 "total": len(type_bots),
                 "active": sum(1 for b in type_bots if b.positions),
@@ -545,39 +751,25 @@ class SmartBotManager:
         
     def get_simulation_summary(self) -> Dict[str, Any]:
         """获取模拟总结"""
-        total_spent = Decimal("0")
-        total_received = Decimal("0")
-        
-        # 计算所有机器人的盈亏
-        for bot in self.bots:
-            # 历史交易
-            for trade in bot.trade_history:
-                if trade.exit_reason != ExitReason.PANIC_SELL:
-                    total_spent += trade.entry_price
-                    total_received += trade.exit_price
-                    
-            # 未平仓位（按当前价值计算）
-            for position in bot.positions:
-                total_spent += position.size
-                
-        # 类型统计
+        total_spent = 0.0
+        total_received = 0.0
+        
+        # 类型统计（已平仓部分读取累计值，只需遍历未平仓位）
         type_stats = {}
         for bot_type in BotType:
-            type_bots = [b for b in self.bots if b.bot_type == bot_type]
-            type_trades = sum(len(b.trade_history) for b in type_bots)
+            type_bots = self._bots_by_type[bot_type]
+            type_trades = self._type_trades[bot_type.value]
             type_active = sum(1 for b in type_bots if b.positions)
             type_waiting = sum(1 for b in type_bots if not b.positions and not b.trade_history)
             
-            # 计算这个类型的盈亏
-            type_spent = Decimal("0")
-            type_received = Decimal("0")
+            # 计算这个类型的盈亏：历史交易 + 未平仓位（按仓位大小计算）
+            type_spent = self._type_spent[bot_type.value]
+            type_received = self._type_received[bot_type.value]
             for bot in type_bots:
-                for trade in bot.trade_history:
-                    if trade.exit_reason != ExitReason.PANIC_SELL:
-                        type_spent += trade.entry_price
-                        type_received += trade.exit_price
                 for position in bot.positions:
                     type_spent += position.size
+            total_spent += type_spent
+            total_received += type_received
             
             type_stats[bot_type.value] = {
                 "count": len(type_bots),
@@ -585,11 +777,11 @@ class SmartBotManager:
                 "exited": len(type_bots) - type_active - type_waiting,
                 "waiting": type_waiting,
                 "trades": type_trades,
-                "total_spent": float(type_spent),
-                "total_received": float(type_received),
-                "profit": float(type_received - type_spent),
-                "profit_ratio": float((type_received - type_spent) / type_spent * 100) if type_spent > 0 else 0,
-                "avg_confidence": float(sum(b.confidence for b in type_bots) / len(type_bots)) if type_bots else 0
+                "total_spent": type_spent,
+                "total_received": type_received,
+                "profit": type_received - type_spent,
+                "profit_ratio": (type_received - type_spent) / type_spent * 100 if type_spent > 0 else 0,
+                "avg_confidence": sum(b.confidence for b in type_bots) / len(type_bots) if type_bots else 0
             }
             
         return {
@@ -598,10 +790,10 @@ class SmartBotManager:
             "active_bots": sum(1 for bot in self.bots if bot.positions),
             "exited_bots": sum(1 for bot in self.bots if not bot.positions and bot.trade_history),
             "waiting_bots": sum(1 for bot in self.bots if not bot.positions and not bot.trade_history),
-            "total_spent": float(total_spent),
-            "total_received": float(total_received),
-            "total_profit": float(total_received - total_spent),
-            "profit_ratio": float((total_received - total_spent) / total_spent) if total_spent > 0 else 0,
+            "total_spent": total_spent,
+            "total_received": total_received,
+            "total_profit": total_received - total_spent,
+            "profit_ratio": (total_received - total_spent) / total_spent if total_spent > 0 else 0,
             "total_trades": self.total_trades,
             "successful_trades": self.successful_trades,
             "success_rate": float(self.successful_trades / self.total_trades) if self.total_trades > 0 else 0,
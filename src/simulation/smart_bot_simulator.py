@@ -2,16 +2,15 @@
 智能机器人模拟器 - 更接近真实的机器人行为
 """
 
-from decimal import Decimal, getcontext
-from typing import Dict, List, Any, Optional, Tuple
+from decimal import Decimal
+from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
 import random
 from enum import Enum, auto
 from dataclasses import dataclass
 import math
 
-# 设置高精度计算
-getcontext().prec = 50
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -26,14 +25,97 @@ class ExitReason(Enum):
 @dataclass
 class TradeMemory:
     """交易记忆"""
-    entry_price: Decimal
-    exit_price: Decimal
-    profit_ratio: Decimal
+    entry_price: float
+    exit_price: float
+    profit_ratio: float
     exit_reason: ExitReason
     hold_time: int
+
+
+# 决策函数使用的整数编码：趋势为-2..2，退出原因使用ExitReason的值
+_TREND_CODES = {"strong_down": -2, "down": -1, "neutral": 0, "up": 1, "strong_up": 2}
+_EXIT_REASONS = {reason.value: reason for reason in ExitReason}
+_EXIT_PANIC_CHECK = -1  # 需要进一步检测绞杀模式，由调用方结合仓位和价格历史判断
+
+_FloatOrArray = Union[float, np.ndarray]
+
+
+def _decide_entries(current_price: float, trend_code: int, volatility: float,
+                    entry_thresholds: _FloatOrArray, squeezed_counts: _FloatOrArray,
+                    confidences: _FloatOrArray, open_sizes: _FloatOrArray,
+                    capitals: _FloatOrArray, risk_tolerances: _FloatOrArray) -> Tuple[Any, Any]:
+    """
+    入场规则：既可传入单个机器人的标量，也可传入全体机器人的数组做向量化判断
+    
+    Returns:
+        (是否入场, 仓位大小)；不入场的机器人仓位大小无意义
+    """
+    # 趋势和波动率得分对所有机器人相同
+    market_score = 0.0
+    if trend_code == -2:
+        market_score += 0.3
+    elif trend_code == -1:
+        market_score += 0.2
+    elif trend_code == 1:
+        market_score -= 0.2
+    if volatility > 0.5:
+        market_score -= 0.1  # 高波动时谨慎
+    
+    # 价格位置得分乘以信心因子
+    price_scores = (entry_thresholds - current_price) / entry_thresholds
+    entry_scores = (market_score + price_scores * 0.5) * confidences
+    
+    # 未满仓、价格低于阈值（被绞杀过则按次数收紧阈值）且得分足够
+    caution_factors = 1 + squeezed_counts * 0.2
+    should_enter = ((open_sizes < capitals * 0.95)
+                    & (current_price <= entry_thresholds)
+                    & (current_price <= entry_thresholds / caution_factors)
+                    & (entry_scores > 0.3))
+    
+    # 分批建仓：基础仓位20%，按得分放大，不超过剩余资金并按风险偏好缩放
+    position_sizes = np.minimum(capitals * 0.2 * (1 + entry_scores), capitals - open_sizes)
+    return should_enter, position_sizes * risk_tolerances
+
+
+def _decide_exit(profit_ratio: float, hold_time: int, stop_loss: float, take_profit: float,
+                 volatility: float, max_hold_time: int) -> Tuple[int, float]:
+    """
+    退出规则的纯数值部分（含动态止损）
+    
+    Returns:
+        (退出原因编码, 退出比例)；编码为ExitReason的值，
+        _EXIT_PANIC_CHECK表示前三项条件均未触发、需要再检测绞杀模式
+    """
+    # 1. 动态止损：盈利5%以上止损线上移到成本附近，高波动时放宽
+    if profit_ratio > 0.05:
+        stop_loss = max(stop_loss, -0.02)
+    if volatility > 0.3:
+        stop_loss *= (1 - volatility * 0.2)
+    if profit_ratio <= stop_loss:
+        return ExitReason.STOP_LOSS.value, 1.0  # 止损全部退出
+    
+    # 2. 分批止盈
+    if profit_ratio >= take_profit:
+        if profit_ratio >= take_profit * 2:
+            return ExitReason.TAKE_PROFIT.value, 0.5  # 超额收益，先出一半
+        return ExitReason.TAKE_PROFIT.value, 0.3  # 达到目标，先出30%
+    
+    # 3. 时间止损
+    if hold_time > max_hold_time:
+        if profit_ratio > 0.0:
+            return ExitReason.TIME_OUT.value, 1.0  # 有利润就全出
+        return ExitReason.TIME_OUT.value, 0.5  # 亏损先出一半
+    
+    return _EXIT_PANIC_CHECK, 0.0
+
     
 class SmartBot:
-    """智能机器人 - 具有学习能力和更真实的交易行为"""
+    """
+    智能机器人 - 具有学习能力和更真实的交易行为
+    
+    热路径上的价格、资金和学习参数统一使用float，
+    只在与AMM池交换时转换为Decimal
+    """
     
     def __init__(self, bot_id: str, bot_type: str, config: Dict[str, Any]):
         self.bot_id = bot_id
@@ -41,14 +123,14 @@ class SmartBot:
         self.config = config
         
         # 基础参数
-        self.total_capital = Decimal(str(config.get("capital", "1000")))
-        self.base_entry_threshold = Decimal(str(config.get("entry_price", "0.003")))
-        self.base_stop_loss = Decimal(str(config.get("stop_loss", "-0.672")))
-        self.base_take_profit = Decimal(str(config.get("take_profit", "0.1")))
+        self.total_capital = float(config.get("capital", "1000"))
+        self.base_entry_threshold = float(config.get("entry_price", "0.003"))
+        self.base_stop_loss = float(config.get("stop_loss", "-0.672"))
+        self.base_take_profit = float(config.get("take_profit", "0.1"))
         
         # 智能参数
-        self.risk_tolerance = Decimal(str(config.get("risk_tolerance", "0.5")))  # 0-1
-        self.learning_rate = Decimal(str(config.get("learning_rate", "0.1")))
+        self.risk_tolerance = float(config.get("risk_tolerance", "0.5"))  # 0-1
+        self.learning_rate = float(config.get("learning_rate", "0.1"))
         self.patience = int(config.get("patience", 100))  # 观察期（区块数）
         
         # 交易状态
@@ -61,19 +143,43 @@ class SmartBot:
         self.current_entry_threshold = self.base_entry_threshold
         self.current_stop_loss = self.base_stop_loss
         self.current_take_profit = self.base_take_profit
-        self.confidence = Decimal("0.5")  # 初始信心水平
-        
-        # 市场状态记忆
-        self.price_history = []  # 记录最近N个价格
+        self.confidence = 0.5  # 初始信心水平
+        
+        # 市场状态记忆：价格历史为预分配的float64环形缓冲区，_head为下一个写入位置，_count为有效条数
+        self.max_history = 100
+        self._prices = np.empty(self.max_history, dtype=np.float64)
+        self._blocks = np.empty(self.max_history, dtype=np.int64)
+        self._head = 0
+        self._count = 0
         self.volatility_memory = []  # 波动率记忆
         self.got_squeezed_count = 0  # 被绞杀次数
         
-    def observe_market(self, current_price: Decimal, current_block: int) -> Dict[str, Any]:
+    def record_price(self, current_price: float, current_block: int):
+        """记录价格历史（不做市场分析），写满后覆盖最旧的一条"""
+        self._prices[self._head] = current_price
+        self._blocks[self._head] = current_block
+        self._head = (self._head + 1) % self.max_history
+        if self._count < self.max_history:
+            self._count += 1
+    
+    @property
+    def price_history(self) -> List[Tuple[int, float]]:
+        """按时间顺序排列的(区块号, 价格)历史（从环形缓冲区构建）"""
+        start = self._head - self._count
+        blocks = np.concatenate((self._blocks[start:], self._blocks[:self._head])) if start < 0 else self._blocks[start:self._head]
+        return list(zip(blocks.tolist(), self._recent_prices(self._count).tolist()))
+    
+    def _recent_prices(self, n: int) -> np.ndarray:
+        """最近n条价格（按时间顺序，n不超过已记录条数）"""
+        start = self._head - n
+        if start >= 0:
+            return self._prices[start:self._head]
+        return np.concatenate((self._prices[start:], self._prices[:self._head]))
+    
+    def observe_market(self, current_price: float, current_block: int) -> Dict[str, Any]:
         """观察市场，收集信息"""
         # 记录价格历史
-        self.price_history.append((current_block, current_price))
-        if len(self.price_history) > 100:  # 只保留最近100个
-            self.price_history.pop(0)
+        self.record_price(current_price, current_block)
         
         # 计算市场指标
         market_analysis = {
@@ -85,203 +191,115 @@ class SmartBot:
         
         return market_analysis
     
-    def should_enter(self, current_price: Decimal, current_block: int, 
-                    market_analysis: Dict[str, Any]) -> Tuple[bool, Decimal]:
+    def should_enter(self, current_price: float, current_block: int, 
+                    market_analysis: Dict[str, Any]) -> Tuple[bool, float]:
         """
         决定是否入场，返回(是否入场, 仓位大小)
         更智能的入场逻辑
         """
-        # 如果已经满仓，不再入场
         total_position = sum(p["size"] for p in self.positions)
-        if total_position >= self.total_capital * Decimal("0.95"):
-            return False, Decimal("0")
-        
-        # 基础条件检查
-        if current_price > self.current_entry_threshold:
-            return False, Decimal("0")
-        
-        # 如果最近被绞杀过，更谨慎
-        if self.got_squeezed_count > 0:
-            caution_factor = Decimal("1") + (Decimal(str(self.got_squeezed_count)) * Decimal("0.2"))
-            adjusted_threshold = self.current_entry_threshold / caution_factor
-            if current_price > adjusted_threshold:
-                return False, Decimal("0")
-        
-        # 分析市场状态
-        trend = market_analysis.get("trend", "neutral")
-        volatility = market_analysis.get("volatility", Decimal("0"))
-        
-        # 根据市场状态调整入场决策
-        entry_score = Decimal("0")
-        
-        # 趋势分析
-        if trend == "strong_down":
-            entry_score += Decimal("0.3")
-        elif trend == "down":
-            entry_score += Decimal("0.2")
-        elif trend == "up":
-            entry_score -= Decimal("0.2")
-        
-        # 波动率分析
-        if volatility > Decimal("0.5"):
-            entry_score -= Decimal("0.1")  # 高波动时谨慎
-        
-        # 价格位置分析
-        price_score = (self.current_entry_threshold - current_price) / self.current_entry_threshold
-        entry_score += price_score * Decimal("0.5")
-        
-        # 信心因子
-        entry_score *= self.confidence
-        
-        # 决定是否入场
-        if entry_score > Decimal("0.3"):
-            # 计算仓位大小（分批建仓）
-            base_position = self.total_capital * Decimal("0.2")  # 基础仓位20%
-            position_size = base_position * (Decimal("1") + entry_score)
-            
-            # 风险控制
-            position_size = min(position_size, self.total_capital - total_position)
-            position_size *= self.risk_tolerance
-            
-            return True, position_size
-        
-        return False, Decimal("0")
+        should_enter, position_size = _decide_entries(
+            current_price,
+            _TREND_CODES.get(market_analysis.get("trend", "neutral"), 0),
+            market_analysis.get("volatility", 0.0),
+            self.current_entry_threshold, self.got_squeezed_count, self.confidence,
+            total_position, self.total_capital, self.risk_tolerance
+        )
+        if should_enter:
+            return True, float(position_size)
+        return False, 0.0
     
-    def should_exit(self, position: Dict[str, Any], current_price: Decimal, 
-                   current_block: int, market_analysis: Dict[str, Any]) -> Tuple[bool, ExitReason, Decimal]:
+    def should_exit(self, position: Dict[str, Any], current_price: float, 
+                   current_block: int, market_analysis: Dict[str, Any]) -> Tuple[bool, ExitReason, float]:
         """
         决定是否退出，返回(是否退出, 退出原因, 退出比例)
         支持部分退出
         """
         entry_price = position["entry_price"]
-        entry_block = position["entry_block"]
-        position_size = position["size"]
         
         # 计算收益率
         profit_ratio = (current_price - entry_price) / entry_price
-        hold_time = current_block - entry_block
         
-        # 1. 检查止损（动态止损）
-        dynamic_stop_loss = self._calculate_dynamic_stop_loss(
-            profit_ratio, hold_time, market_analysis
+        reason_code, exit_ratio = _decide_exit(
+            profit_ratio, current_block - position["entry_block"],
+            self.current_stop_loss, self.current_take_profit,
+            market_analysis.get("volatility", 0.0), self._get_max_hold_time()
         )
-        if profit_ratio <= dynamic_stop_loss:
-            return True, ExitReason.STOP_LOSS, Decimal("1.0")  # 止损全部退出
-        
-        # 2. 检查止盈（分批止盈）
-        if profit_ratio >= self.current_take_profit:
-            # 根据收益率决定退出比例
-            if profit_ratio >= self.current_take_profit * Decimal("2"):
-                return True, ExitReason.TAKE_PROFIT, Decimal("0.5")  # 超额收益，先出一半
-            else:
-                return True, ExitReason.TAKE_PROFIT, Decimal("0.3")  # 达到目标，先出30%
-        
-        # 3. 时间止损
-        max_hold_time = self._get_max_hold_time()
-        if hold_time > max_hold_time:
-            if profit_ratio > Decimal("0"):
-                return True, ExitReason.TIME_OUT, Decimal("1.0")  # 有利润就全出
-            else:
-                return True, ExitReason.TIME_OUT, Decimal("0.5")  # 亏损先出一半
+        if reason_code != _EXIT_PANIC_CHECK:
+            return True, _EXIT_REASONS[reason_code], exit_ratio
         
         # 4. 恐慌性卖出（检测到可能的绞杀）
         if self._detect_squeeze_pattern(market_analysis):
             self.got_squeezed_count += 1
-            return True, ExitReason.PANIC_SELL, Decimal("1.0")  # 恐慌全出
+            return True, ExitReason.PANIC_SELL, 1.0  # 恐慌全出
         
-        return False, None, Decimal("0")
+        return False, None, 0.0
     
     def _calculate_trend(self) -> str:
         """计算价格趋势"""
-        if len(self.price_history) < 10:
+        if self._count < 10:
             return "neutral"
         
-        # 简单移动平均
-        recent_prices = [p[1] for p in self.price_history[-10:]]
-        avg_recent = sum(recent_prices) / len(recent_prices)
-        
-        older_prices = [p[1] for p in self.price_history[-20:-10]] if len(self.price_history) >= 20 else recent_prices
-        avg_older = sum(older_prices) / len(older_prices)
+        # 简单移动平均：最近10个价格对比之前10个（不足20个时与自身比较）
+        if self._count >= 20:
+            prices = self._recent_prices(20)
+            avg_recent = float(prices[10:].mean())
+            avg_older = float(prices[:10].mean())
+        else:
+            avg_recent = avg_older = float(self._recent_prices(10).mean())
         
-        ratio = (avg_recent - avg_older) / avg_older if avg_older > 0 else Decimal("0")
+        ratio = (avg_recent - avg_older) / avg_older if avg_older > 0 else 0.0
         
-        if ratio < Decimal("-0.1"):
+        if ratio < -0.1:
             return "strong_down"
-        elif ratio < Decimal("-0.03"):
+        elif ratio < -0.03:
             return "down"
-        elif ratio > Decimal("0.1"):
+        elif ratio > 0.1:
             return "strong_up"
-        elif ratio > Decimal("0.03"):
+        elif ratio > 0.03:
             return "up"
         else:
             return "neutral"
     
-    def _calculate_volatility(self) -> Decimal:
+    def _calculate_volatility(self) -> float:
         """计算价格波动率"""
-        if len(self.price_history) < 5:
-            return Decimal("0")
+        if self._count < 5:
+            return 0.0
         
-        prices = [p[1] for p in self.price_history[-20:]]
-        avg_price = sum(prices) / len(prices)
+        prices = self._recent_prices(min(self._count, 20))
+        avg_price = float(prices.mean())
         
         if avg_price == 0:
-            return Decimal("0")
-        
-        variance = sum((p - avg_price) ** 2 for p in prices) / len(prices)
-        std_dev = variance.sqrt()
+            return 0.0
         
-        return std_dev / avg_price
+        return float(prices.std()) / avg_price
     
-    def _calculate_momentum(self) -> Decimal:
+    def _calculate_momentum(self) -> float:
         """计算动量指标"""
-        if len(self.price_history) < 5:
-            return Decimal("0")
+        if self._count < 5:
+            return 0.0
         
-        current_price = self.price_history[-1][1]
-        past_price = self.price_history[-5][1]
+        current_price = float(self._prices[self._head - 1])
+        past_price = float(self._prices[self._head - 5])
         
         if past_price == 0:
-            return Decimal("0")
+            return 0.0
         
         return (current_price - past_price) / past_price
     
-    def _find_support_resistance(self) -> Dict[str, Decimal]:
+    def _find_support_resistance(self) -> Dict[str, float]:
         """寻找支撑和阻力位"""
-        if len(self.price_history) < 20:
-            return {"support": Decimal("0"), "resistance": Decimal("999")}
+        if self._count < 20:
+            return {"support": 0.0, "resistance": 999}
         
-        prices = [p[1] for p in self.price_history]
+        prices = self._recent_prices(20)
         
         # 简化版：使用最近的最低和最高价
-        support = min(prices[-20:])
-        resistance = max(prices[-20:])
+        support = float(prices.min())
+        resistance = float(prices.max())
         
         return {"support": support, "resistance": resistance}
     
-    def _calculate_dynamic_stop_loss(self, profit_ratio: Decimal, 
-                                   hold_time: int, market_analysis: Dict[str, Any]) -> Decimal:
-        """计算动态止损线"""
-        base_stop = self.current_stop_loss
-        
-        # 根据持有时间调整
-        time_factor = Decimal(str(min(hold_time / 7200, 1)))  # 最多1天
-        
-        # 根据盈利情况调整（移动止损）
-        if profit_ratio > Decimal("0.05"):
-            # 盈利5%以上，止损线上移到成本附近
-            base_stop = max(base_stop, Decimal("-0.02"))
-        elif profit_ratio > Decimal("0.1"):
-            # 盈利10%以上，止损线上移到盈利5%
-            base_stop = max(base_stop, Decimal("0.05"))
-        
-        # 根据市场波动调整
-        volatility = market_analysis.get("volatility", Decimal("0"))
-        if volatility > Decimal("0.3"):
-            # 高波动时放宽止损
-            base_stop *= (Decimal("1") - volatility * Decimal("0.2"))
-        
-        return base_stop
-    
     def _get_max_hold_time(self) -> int:
         """获取最大持有时间"""
         # 根据机器人类型设置不同的持有时间
@@ -304,22 +322,22 @@ class SmartBot:
     
     def _detect_squeeze_pattern(self, market_analysis: Dict[str, Any]) -> bool:
         """检测可能的绞杀模式"""
-        if len(self.price_history) < 10:
+        if self._count < 10:
             return False
         
         # 检测快速拉升
-        momentum = market_analysis.get("momentum", Decimal("0"))
-        if momentum > Decimal("0.2"):  # 20%快速上涨
+        momentum = market_analysis.get("momentum", 0.0)
+        if momentum > 0.2:  # 20%快速上涨
             # 检查是否处于亏损状态
+            current_price = float(self._prices[self._head - 1])
             for position in self.positions:
                 entry_price = position["entry_price"]
-                current_price = self.price_history[-1][1]
-                if current_price < entry_price * Decimal("0.4"):  # 亏损超过60%
+                if current_price < entry_price * 0.4:  # 亏损超过60%
                     return True
         
         # 检测异常波动
-        volatility = market_analysis.get("volatility", Decimal("0"))
-        if volatility > Decimal("0.5"):  # 波动率超过50%
+        volatility = market_analysis.get("volatility", 0.0)
+        if volatility > 0.5:  # 波动率超过50%
             trend = market_analysis.get("trend", "neutral")
             if trend in ["strong_up", "strong_down"]:
                 return True
@@ -329,23 +347,23 @@ class SmartBot:
     def update_learning(self, trade_result: TradeMemory):
         """根据交易结果更新学习参数"""
         # 更新信心水平
-        if trade_result.profit_ratio > Decimal("0"):
-            self.confidence = min(Decimal("1"), self.confidence + self.learning_rate)
+        if trade_result.profit_ratio > 0.0:
+            self.confidence = min(1, self.confidence + self.learning_rate)
         else:
-            self.confidence = max(Decimal("0.1"), self.confidence - self.learning_rate)
+            self.confidence = max(0.1, self.confidence - self.learning_rate)
         
         # 更新入场阈值
         if trade_result.exit_reason == ExitReason.STOP_LOSS:
             # 止损了，下次更谨慎
-            self.current_entry_threshold *= Decimal("0.95")
+            self.current_entry_threshold *= 0.95
         elif trade_result.exit_reason == ExitReason.TAKE_PROFIT:
             # 止盈了，可以稍微激进
-            self.current_entry_threshold *= Decimal("1.02")
+            self.current_entry_threshold *= 1.02
         
         # 更新止损止盈线
-        if trade_result.profit_ratio < Decimal("-0.5"):
+        if trade_result.profit_ratio < -0.5:
             # 大亏，收紧止损
-            self.current_stop_loss = max(self.current_stop_loss * Decimal("1.1"), Decimal("-0.5"))
+            self.current_stop_loss = max(self.current_stop_loss * 1.1, -0.5)
         
         # 记录交易历史
         self.trade_history.append(trade_result)
@@ -465,17 +483,36 @@ class SmartBotSwarm:
             )
             self.bots.append(bot)
         
+        # 入场判断所需状态的结构数组（SoA），每个区块对全体机器人做向量化筛选
+        self._capitals = np.array([bot.total_capital for bot in self.bots], dtype=np.float64)
+        self._risk_tolerances = np.array([bot.risk_tolerance for bot in self.bots], dtype=np.float64)
+        self._entry_thresholds = np.array([bot.current_entry_threshold for bot in self.bots], dtype=np.float64)
+        self._confidences = np.array([bot.confidence for bot in self.bots], dtype=np.float64)
+        self._squeezed_counts = np.zeros(len(self.bots), dtype=np.float64)
+        self._open_sizes = np.zeros(len(self.bots), dtype=np.float64)
+        self._has_positions = np.zeros(len(self.bots), dtype=bool)
+        
         logger.info(f"初始化 {len(self.bots)} 个智能机器人")
     
+    def _sync_bot_state(self, index: int, bot: SmartBot):
+        """把机器人交易后的状态写回结构数组"""
+        self._entry_thresholds[index] = bot.current_entry_threshold
+        self._confidences[index] = bot.confidence
+        self._squeezed_counts[index] = bot.got_squeezed_count
+        self._open_sizes[index] = sum(p["size"] for p in bot.positions)
+        self._has_positions[index] = bool(bot.positions)
+    
     def process_block(self, current_price: Decimal, current_block: int, 
                      amm_pool) -> Dict[str, Any]:
         """处理每个区块的机器人行为"""
         if not self.enabled:
             return {}
         
+        price = float(current_price)
+        
         # 更新市场分析（所有机器人共享）
         if self.bots:
-            self.market_analysis = self.bots[0].observe_market(current_price, current_block)
+            self.market_analysis = self.bots[0].observe_market(price, current_block)
         
         # 统计数据
         stats = {
@@ -485,38 +522,52 @@ class SmartBotSwarm:
             "stop_losses": 0,
             "take_profits": 0,
             "panic_sells": 0,
-            "total_volume": Decimal("0")
+            "total_volume": 0.0
         }
         
-        # 处理每个机器人
+        # 更新市场观察（各机器人只需记录价格，分析结果已共享）
         for bot in self.bots:
-            # 更新市场观察
-            bot.observe_market(current_price, current_block)
+            bot.record_price(price, current_block)
+        
+        if not self.bots:
+            return stats
+        
+        # 向量化入场判断：只有入场或持有仓位的机器人需要逐个处理
+        enter_mask, position_sizes = _decide_entries(
+            price,
+            _TREND_CODES.get(self.market_analysis.get("trend", "neutral"), 0),
+            self.market_analysis.get("volatility", 0.0),
+            self._entry_thresholds, self._squeezed_counts, self._confidences,
+            self._open_sizes, self._capitals, self._risk_tolerances
+        )
+        active = np.flatnonzero(enter_mask | self._has_positions)
+        
+        for index in active.tolist():
+            bot = self.bots[index]
             
             # 检查是否应该入场
-            should_enter, position_size = bot.should_enter(
-                current_price, current_block, self.market_analysis
-            )
-            
-            if should_enter and position_size > 0:
-                # 执行买入
-                result = amm_pool.swap_tao_for_dtao(position_size)
-                if result["success"]:
-                    bot.positions.append({
-                        "entry_price": current_price,
-                        "entry_block": current_block,
-                        "size": position_size,
-                        "dtao_amount": result["dtao_received"]
-                    })
-                    stats["entries"] += 1
-                    stats["total_volume"] += position_size
-                    logger.debug(f"Bot {bot.bot_id} 入场: {position_size:.2f} TAO @ {current_price:.6f}")
+            if enter_mask[index]:
+                position_size = float(position_sizes[index])
+                
+                if position_size > 0:
+                    # 执行买入
+                    result = amm_pool.swap_tao_for_dtao(Decimal(repr(position_size)))
+                    if result["success"]:
+                        bot.positions.append({
+                            "entry_price": price,
+                            "entry_block": current_block,
+                            "size": position_size,
+                            "dtao_amount": float(result["dtao_received"])
+                        })
+                        stats["entries"] += 1
+                        stats["total_volume"] += position_size
+                        logger.debug(f"Bot {bot.bot_id} 入场: {position_size:.2f} TAO @ {price:.6f}")
             
             # 检查现有仓位是否应该退出
             positions_to_remove = []
             for i, position in enumerate(bot.positions):
                 should_exit, exit_reason, exit_ratio = bot.should_exit(
-                    position, current_price, current_block, self.market_analysis
+                    position, price, current_block, self.market_analysis
                 )
                 
                 if should_exit:
@@ -524,13 +575,13 @@ class SmartBotSwarm:
                     exit_dtao = position["dtao_amount"] * exit_ratio
                     
                     # 执行卖出
-                    result = amm_pool.swap_dtao_for_tao(exit_dtao)
+                    result = amm_pool.swap_dtao_for_tao(Decimal(repr(exit_dtao)))
                     if result["success"]:
                         # 记录交易结果
-                        profit_ratio = (current_price - position["entry_price"]) / position["entry_price"]
+                        profit_ratio = (price - position["entry_price"]) / position["entry_price"]
                         trade_memory = TradeMemory(
                             entry_price=position["entry_price"],
-                            exit_price=current_price,
+                            exit_price=price,
                             profit_ratio=profit_ratio,
                             exit_reason=exit_reason,
                             hold_time=current_block - position["entry_block"]
@@ -540,13 +591,13 @@ class SmartBotSwarm:
                         bot.update_learning(trade_memory)
                         
                         # 更新统计
-                        if exit_ratio >= Decimal("1.0"):
+                        if exit_ratio >= 1.0:
                             stats["exits"] += 1
                             positions_to_remove.append(i)
                         else:
                             stats["partial_exits"] += 1
                             position["dtao_amount"] -= exit_dtao
-                            position["size"] *= (Decimal("1") - exit_ratio)
+                            position["size"] *= (1 - exit_ratio)
                         
                         if exit_reason == ExitReason.STOP_LOSS:
                             stats["stop_losses"] += 1
@@ -555,22 +606,24 @@ class SmartBotSwarm:
                         elif exit_reason == ExitReason.PANIC_SELL:
                             stats["panic_sells"] += 1
                         
-                        stats["total_volume"] += result["tao_received"]
+                        stats["total_volume"] += float(result["tao_received"])
                         
                         logger.debug(f"Bot {bot.bot_id} {exit_reason.name}: "
-                                   f"{exit_ratio*100:.0f}% @ {current_price:.6f} "
+                                   f"{exit_ratio*100:.0f}% @ {price:.6f} "
                                    f"({profit_ratio*100:+.2f}%)")
             
             # 移除已完全退出的仓位
             for i in reversed(positions_to_remove):
                 bot.positions.pop(i)
+            
+            self._sync_bot_state(index, bot)
         
         return stats
     
     def get_summary(self) -> Dict[str, Any]:
         """获取机器人群体摘要"""
         total_positions = sum(len(bot.positions) for bot in self.bots)
-        total_value = Decimal("0")
+        total_value = 0.0
         total_learned = sum(bot.got_squeezed_count for bot in self.bots)
         
         # 计算总价值
@@ -578,7 +631,7 @@ class SmartBotSwarm:
             for position in bot.positions:
                 total_value += position["size"]
         
-        avg_confidence = sum(bot.confidence for bot in self.bots) / len(self.bots) if self.bots else Decimal("0")
+        avg_confidence = sum(bot.confidence for bot in self.bots) / len(self.bots) if self.bots else 0.0
         
         return {
             "total_bots": len(self.bots),
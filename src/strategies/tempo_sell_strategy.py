@@ -3,7 +3,7 @@ Tempo卖出策略 - 基于价格阈值的买入卖出策略
 """
 
 from decimal import Decimal, getcontext
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 from enum import Enum, auto
 
@@ -67,8 +67,9 @@ class TempoSellStrategy:
         # 累计TAO注入量追踪
         self.cumulative_tao_injected = Decimal("0")
         
-        # 交易记录
-        self.transaction_log = []
+        # 交易记录（按列缓存，避免累积大量字典；缺失字段以None补齐）
+        self._tx_cols: Dict[str, List[Any]] = {}
+        self._tx_count = 0
         self.pending_sells = {}  # {block: dtao_amount}
         
         # 策略阶段
@@ -163,7 +164,7 @@ class TempoSellStrategy:
                 "tao_balance": self.current_tao_balance,
                 "dtao_balance": self.current_dtao_balance
             }
-            self.transaction_log.append(transaction)
+            self._log_transaction(transaction)
             
             logger.info(f"买入执行: 花费{tao_to_spend}TAO, 获得{result['dtao_received']}dTAO, 价格={current_price}")
             
@@ -323,7 +324,7 @@ class TempoSellStrategy:
             "reserve_dtao": self.reserve_dtao,
             "remaining_to_sell": remaining_to_sell
         }
-        self.transaction_log.append(transaction)
+        self._log_transaction(transaction)
         
         logger.info(f"🚀 分批大量卖出完成: 成功{successful_batches}/{batches_to_process}批, 总计卖出{total_dtao_sold:.4f} dTAO, 获得{total_tao_received:.4f} TAO, 剩余{self.current_dtao_balance:.4f} dTAO")
         return transaction
@@ -448,7 +449,7 @@ class TempoSellStrategy:
                         "tao_balance": self.current_tao_balance,
                         "dtao_balance": self.current_dtao_balance
                     }
-                    self.transaction_log.append(transaction)
+                    self._log_transaction(transaction)
                     transactions.append(transaction)
                     
                     logger.info(f"常规卖出执行: 卖出{dtao_to_sell}dTAO, 获得{result['tao_received']}TAO")
@@ -543,7 +544,7 @@ class TempoSellStrategy:
                 "dtao_balance": self.current_dtao_balance,
                 "remaining": remaining
             }
-            self.transaction_log.append(transaction)
+            self._log_transaction(transaction)
             
             logger.info(f"🔄 继续批量卖出完成: {successful_batches}/{batches_to_process}批, 卖出{total_dtao_sold:.4f} dTAO")
             return transaction
@@ -687,7 +688,7 @@ class TempoSellStrategy:
                 "dtao_balance": self.current_dtao_balance,
                 "second_buy_remaining": self.second_buy_remaining
             }
-            self.transaction_log.append(transaction)
+            self._log_transaction(transaction)
             
             # 检查是否完成所有二次增持
             if self.second_buy_remaining <= Decimal("0.01"):  # 允许小数精度误差
@@ -737,10 +738,57 @@ class TempoSellStrategy:
             "strategy_phase": self.phase.value,
             "mass_sell_triggered": self.mass_sell_triggered,
             "pending_sells_count": len(self.pending_sells),
-            "transaction_count": len(self.transaction_log),
+            "transaction_count": self._tx_count,
             "market_price_used": current_market_price  # 新增：记录使用的市场价格
         }
     
+    def _log_transaction(self, transaction: Dict[str, Any]) -> None:
+        """
+        将一笔交易追加到列缓存
+        
+        Args:
+            transaction: 交易记录字典
+        """
+        cols = self._tx_cols
+        count = self._tx_count
+        for key, value in transaction.items():
+            column = cols.get(key)
+            if column is None:
+                column = cols[key] = [None] * count
+            column.append(value)
+        count += 1
+        for column in cols.values():
+            if len(column) < count:
+                column.append(None)
+        self._tx_count = count
+    
+    @property
+    def transaction_log(self) -> List[Dict[str, Any]]:
+        """按行重建的交易记录（兼容旧接口，每次调用都会重新构建）"""
+        cols = self._tx_cols
+        return [
+            {key: column[i] for key, column in cols.items() if column[i] is not None}
+            for i in range(self._tx_count)
+        ]
+    
+    def get_transaction_columns(self) -> Dict[str, List[Any]]:
+        """
+        获取按列存储的交易记录，可直接用于构建DataFrame
+        
+        Returns:
+            {字段名: 值列表}，各列长度一致
+        """
+        return self._tx_cols
+    
+    def get_hot_stats(self) -> Tuple[float, float]:
+        """
+        每区块记录用的轻量统计（不计算总资产和ROI）
+        
+        Returns:
+            (TAO余额, dTAO余额)，均为float
+        """
+        return float(self.current_tao_balance), float(self.current_dtao_balance)
+    
     def get_performance_summary(self, current_market_price: Decimal = None) -> Dict[str, Any]:
         """
         获取策略性能摘要
@@ -755,18 +803,20 @@ class TempoSellStrategy:
         stats = self.get_portfolio_stats(current_market_price=current_market_price)
         
         # 计算交易统计
-        buy_transactions = [tx for tx in self.transaction_log if tx["type"] == "buy"]
-        sell_transactions = [tx for tx in self.transaction_log if tx["type"] in ["mass_sell", "regular_sell"]]
+        tx_types = self._tx_cols.get("type", [])
+        tx_prices = self._tx_cols.get("price", [])
+        buy_prices = [price for tx_type, price in zip(tx_types, tx_prices) if tx_type == "buy"]
+        sell_prices = [price for tx_type, price in zip(tx_types, tx_prices) if tx_type in ("mass_sell", "regular_sell")]
         
-        avg_buy_price = (sum(tx["price"] for tx in buy_transactions) / len(buy_transactions)) if buy_transactions else Decimal("0")
-        avg_sell_price = (sum(tx["price"] for tx in sell_transactions) / len(sell_transactions)) if sell_transactions else Decimal("0")
+        avg_buy_price = (sum(buy_prices) / len(buy_prices)) if buy_prices else Decimal("0")
+        avg_sell_price = (sum(sell_prices) / len(sell_prices)) if sell_prices else Decimal("0")
         
         return {
             "portfolio_stats": stats,
             "trading_stats": {
-                "total_transactions": len(self.transaction_log),
-                "buy_transactions": len(buy_transactions),
-                "sell_transactions": len(sell_transactions),
+                "total_transactions": self._tx_count,
+                "buy_transactions": len(buy_prices),
+                "sell_transactions": len(sell_prices),
                 "avg_buy_price": avg_buy_price,
                 "avg_sell_price": avg_sell_price
             },
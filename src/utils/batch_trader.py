@@ -14,14 +14,62 @@ logger = logging.getLogger(__name__)
 class BatchTrader:
     """分批交易器，控制每笔交易的滑点在指定范围内"""
     
-    def __init__(self, max_slippage: Decimal = Decimal("0.05")):
+    def __init__(self, max_slippage: Decimal = Decimal("0.05"), fast_math: bool = False):
         """
         初始化分批交易器
         
         Args:
             max_slippage: 最大允许滑点（默认5%）
+            fast_math: 批次大小的二分搜索使用float计算（结果仍返回Decimal）
         """
         self.max_slippage = max_slippage
+        self.fast_math = fast_math
+        self._max_slippage_f = float(max_slippage)
+        
+    def _search_batch_size_f(self, total: Decimal, pool_in: Decimal, pool_out: Decimal,
+                             is_buy: bool) -> Decimal:
+        """
+        calculate_batch_size_for_buy/sell的float版本
+        
+        pool_in为被注入的一侧储备（买入为TAO，卖出为dTAO），二分过程与Decimal版本相同。
+        """
+        pool_in_f = float(pool_in)
+        pool_out_f = float(pool_out)
+        k = pool_in_f * pool_out_f
+        max_slippage = self._max_slippage_f
+        
+        # 当前价格 = TAO储备 / dTAO储备
+        if is_buy:
+            current_price = pool_in_f / pool_out_f
+        else:
+            current_price = pool_out_f / pool_in_f
+        
+        left = 0.0001
+        right = min(float(total), pool_in_f * 0.9)  # 最多使用90%的池子
+        
+        while right - left > 0.0001:
+            mid = (left + right) / 2
+            new_pool_in = pool_in_f + mid
+            new_pool_out = k / new_pool_in
+            if is_buy:
+                new_price = new_pool_in / new_pool_out
+            else:
+                new_price = new_pool_out / new_pool_in
+            
+            slippage = abs(new_price - current_price) / current_price
+            
+            if slippage <= max_slippage:
+                left = mid
+            else:
+                right = mid
+                
+        batch_size = Decimal(repr(left))
+        
+        # 确保批次大小合理
+        if batch_size < Decimal("0.01"):
+            batch_size = Decimal("0.01")
+            
+        return min(batch_size, total)
         
     def calculate_batch_size_for_buy(self, 
                                    total_tao: Decimal,
@@ -38,6 +86,9 @@ class BatchTrader:
         Returns:
             单批次买入的TAO数量
         """
+        if self.fast_math:
+            return self._search_batch_size_f(total_tao, pool_tao, pool_dtao, is_buy=True)
+            
         # 当前价格 = TAO储备 / dTAO储备
         current_price = pool_tao / pool_dtao
         
@@ -88,6 +139,9 @@ class BatchTrader:
         Returns:
             单批次卖出的dTAO数量
         """
+        if self.fast_math:
+            return self._search_batch_size_f(total_dtao, pool_dtao, pool_tao, is_buy=False)
+            
         # 当前价格 = TAO储备 / dTAO储备
         current_price = pool_tao / pool_dtao
         
@@ -155,8 +209,9 @@ class BatchTrader:
         if remaining >= Decimal("0.01"):
             batches.append(remaining)
             
-        logger.info(f"买入订单拆分: 总量={total_tao}, 批次数={len(batches)}, "
-                   f"批次大小={[float(b) for b in batches[:3]]}...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("买入订单拆分: 总量=%s, 批次数=%s, 批次大小=%s...",
+                        total_tao, len(batches), [float(b) for b in batches[:3]])
         
         return batches
         
@@ -196,7 +251,8 @@ class BatchTrader:
         if remaining >= Decimal("0.01"):
             batches.append(remaining)
             
-        logger.info(f"卖出订单拆分: 总量={total_dtao}, 批次数={len(batches)}, "
-                   f"批次大小={[float(b) for b in batches[:3]]}...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("卖出订单拆分: 总量=%s, 批次数=%s, 批次大小=%s...",
+                        total_dtao, len(batches), [float(b) for b in batches[:3]])
         
         return batches
\ No newline at end of file
@@ -16,6 +16,11 @@ class SimulationConfig:
     blocks_per_day: int = 7200
     tempo_blocks: int = 360
     tao_per_block: str = "1.0"
+    storage_mode: str = "sqlite"  # sqlite: 逐区块写入block_data表; npz: 结束时导出block_data.npz
+    fast_math: bool = False  # 策略分批交易的批次搜索使用float（池子和账户仍为Decimal）
+    persist_details: bool = True  # 是否把绞杀操作的完整结果序列化到details列
+    record_batch_info: bool = True  # 是否在区块结果中记录策略分批交易明细
+    portfolio_sample_interval: int = 1  # 区块记录中策略持仓统计的采样间隔（区块数）
     
 @dataclass
 class MarketConfig:
@@ -102,7 +107,12 @@ class UnifiedConfig:
                 "days": self.simulation.days,
                 "blocks_per_day": self.simulation.blocks_per_day,
                 "tempo_blocks": self.simulation.tempo_blocks,
-                "tao_per_block": self.simulation.tao_per_block
+                "tao_per_block": self.simulation.tao_per_block,
+                "storage_mode": self.simulation.storage_mode,
+                "fast_math": self.simulation.fast_math,
+                "persist_details": self.simulation.persist_details,
+                "record_batch_info": self.simulation.record_batch_info,
+                "portfolio_sample_interval": self.simulation.portfolio_sample_interval
             },
             "market": {
                 "other_subnets_avg_price": self.market.other_subnets_avg_price
@@ -172,6 +182,11 @@ class UnifiedConfig:
             config.simulation.blocks_per_day = sim.get("blocks_per_day", 7200)
             config.simulation.tempo_blocks = sim.get("tempo_blocks", 360)
             config.simulation.tao_per_block = str(sim.get("tao_per_block", "1.0"))
+            config.simulation.storage_mode = sim.get("storage_mode", "sqlite")
+            config.simulation.fast_math = bool(sim.get("fast_math", False))
+            config.simulation.persist_details = bool(sim.get("persist_details", True))
+            config.simulation.record_batch_info = bool(sim.get("record_batch_info", True))
+            config.simulation.portfolio_sample_interval = int(sim.get("portfolio_sample_interval", 1))
             
         # 市场配置
         if "market" in data:
@@ -240,6 +255,12 @@ class UnifiedConfig:
         if self.simulation.days <= 0:
             errors.append("模拟天数必须大于0")
             
+        if self.simulation.portfolio_sample_interval < 1:
+            errors.append("portfolio_sample_interval必须大于等于1")
+            
+        if self.simulation.storage_mode not in ("sqlite", "npz"):
+            errors.append(f"storage_mode必须为sqlite或npz，当前为{self.simulation.storage_mode}")
+            
         if Decimal(self.subnet.moving_alpha) < 0 or Decimal(self.subnet.moving_alpha) > 1:
             errors.append("moving_alpha必须在0到1之间")
             